@@ -29,6 +29,49 @@ def _clean_paths(root=True):
                 shutil.rmtree(path.as_posix(), ignore_errors=True)
 
 
+def _make_fake_uv(sleep=0):
+    # the fake uv records the target, then installs mock_uv_pkg with the args into it
+    fake_uv = Path("mock_uv")
+    fake_uv.write_text(
+        f"#!{sys.executable}\n"
+        "import os, sys, time\n"
+        "args = sys.argv[1:]\n"
+        "target = args[args.index('-t') + 1]\n"
+        "with open(os.path.join(os.path.dirname(sys.argv[0]), 'mock_uv_calls.txt'), 'a') as f:\n"
+        "    f.write(target + '\\n')\n"
+        f"time.sleep({sleep})\n"
+        "with open(os.path.join(target, 'mock_uv_pkg.py'), 'w') as f:\n"
+        "    f.write('ok = 1\\nargs = %r\\n' % (args,))\n"
+    )
+    fake_uv.chmod(0o755)
+    return fake_uv
+
+
+def _make_wheel(name, version, files=None, entry_points=""):
+    # the pure python wheel, files: {member: content} besides the dist-info
+    from zipfile import ZipFile
+
+    wheel_path = Path(f"{name}-{version}-py3-none-any.whl")
+    dist_info = f"{name}-{version}.dist-info"
+    if files is None:
+        files = {f"{name}/__init__.py": f"version = {version!r}"}
+    with ZipFile(wheel_path, "w") as zf:
+        for member, content in files.items():
+            zf.writestr(member, content)
+        zf.writestr(
+            f"{dist_info}/METADATA",
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        )
+        zf.writestr(
+            f"{dist_info}/WHEEL",
+            "Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+        )
+        zf.writestr(f"{dist_info}/RECORD", "")
+        if entry_points:
+            zf.writestr(f"{dist_info}/entry_points.txt", entry_points)
+    return wheel_path
+
+
 def test_quiet_mode():
     # test -qqqq quiet mode
     _clean_paths(root=False)
@@ -791,6 +834,998 @@ def test_uvx_zipapps():
     assert b"app.pyz" in output, output.decode("utf-8", "replace")
 
 
+def test_serve():
+    # test the build server: coalescing and cached copy
+    import json
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    import time
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+    from zipfile import ZipFile
+
+    from zipapps.serving import BuildServer
+
+    _clean_paths(root=False)
+    Path("mock_main.py").write_text("def main():\n    print('ok')\n")
+    server = BuildServer(address="127.0.0.1:0", work_dir="serve_dir", max_workers=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        host, port = server.server_address[:2]
+        kwargs = {
+            "includes": "mock_main.py",
+            "main": "mock_main:main",
+            "build_id": "test_serve",
+        }
+
+        def post(_=None, data=kwargs):
+            req = Request(f"http://{host}:{port}/build", data=json.dumps(data).encode())
+            with urlopen(req, timeout=60) as resp:
+                return resp.headers["X-Zipapps-Cached"], resp.read()
+
+        with ThreadPoolExecutor(3) as pool:
+            results = list(pool.map(post, range(3)))
+        assert len({body for _, body in results}) == 1
+        Path("served.pyz").write_bytes(results[0][1])
+        with ZipFile("served.pyz") as zf:
+            assert "mock_main.py" in zf.namelist()
+        output = subprocess.check_output([sys.executable, "served.pyz"])
+        assert output.strip() == b"ok", output
+        # build_id hits, return the cached copy
+        cached, body = post()
+        assert cached == "1" and body == results[0][1]
+        # the same inputs without build_id, fetched from the artifacts
+        data = dict(kwargs, build_id="")
+        assert post(data=data)[0] == "0"
+        assert post(data=dict(data, output="other.pyz"))[0] == "0"
+        assert post(data=dict(data, output="other.pyz"))[0] == "1"
+        assert post(data=data)[0] == "1"
+        # the server files out of the working folder
+        for bad_kwargs in [
+            {"includes": "/etc/passwd"},
+            {"includes": "mock_main.py,../mock_main.py"},
+            {"includes": "~/.ssh"},
+            {"cache_path": "/tmp/zipapps_bad"},
+            {"pip_args": ["-r", "requirements.txt"]},
+            {"pip_args": ["--requirement=requirements.txt"]},
+            {"pip_args": ["./mock_pkg"]},
+            {"pip_args": ["pkg @ file:///tmp/pkg.whl"]},
+            {"uv_path": "/tmp/uv"},
+            {"rm_patterns": "*.dist-info,../../victim/*"},
+            {"rm_patterns": "/tmp/victim/*"},
+            {"layer_mode": True, "layer_mode_prefix": "/tmp/victim"},
+            {"layer_mode": True, "layer_mode_prefix": "C:victim"},
+            {"layer_mode": True, "layer_mode_prefix": "python/../.."},
+        ]:
+            try:
+                post(data=bad_kwargs)
+                raise AssertionError(bad_kwargs)
+            except HTTPError as error:
+                assert error.code == 400, bad_kwargs
+        # the unused files are removed
+        server.max_age = 0.01
+        time.sleep(0.1)
+        assert server.collect_garbage(force=True)
+        assert not list(Path("serve_dir").glob("*/*.pyz"))
+    finally:
+        server.shutdown()
+        server.close()
+    for address in ("0.0.0.0:0", ":0"):
+        try:
+            BuildServer.check_address(address)
+            raise AssertionError(address)
+        except ValueError:
+            pass
+    BuildServer.check_address("0.0.0.0:0", allow_remote=True)
+    BuildServer.check_address("localhost:0")
+
+
+def test_artifact_store():
+    # test artifact_store: fetch the built file instead of building it again
+    import json
+    import threading
+    from zipfile import ZipFile
+
+    from zipapps.artifacts import ArtifactStore
+    from zipapps.main import ZipApp
+    from zipapps.serving import BuildServer
+
+    _clean_paths(root=False)
+    Path("mock_main.py").write_text("def main():\n    print('ok')\n")
+    create_app(includes="mock_main.py", main="mock_main:main", artifact_store="store")
+    stored = list(Path("store").glob("*/*.pyz"))
+    assert len(stored) == 1, stored
+    Path("app.pyz").unlink()
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-m",
+            "zipapps",
+            "-a",
+            "mock_main.py",
+            "-m",
+            "mock_main:main",
+            "--artifact-store",
+            "store",
+        ],
+        stderr=subprocess.STDOUT,
+    )
+    assert b"fetched `app.pyz` from the artifact store" in output, output
+    assert stored[0].read_bytes() == Path("app.pyz").read_bytes()
+    # changed input files, new key
+    Path("mock_main.py").write_text("def main():\n    print('changed')\n")
+    create_app(includes="mock_main.py", main="mock_main:main", artifact_store="store")
+    assert len(list(Path("store").glob("*/*.pyz"))) == 2
+    output = subprocess.check_output([sys.executable, "app.pyz"])
+    assert output.strip() == b"changed", output
+    # http store served by --serve
+    server = BuildServer(address="127.0.0.1:0", work_dir="serve_dir", max_workers=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        host, port = server.server_address[:2]
+        url = f"http://{host}:{port}/artifacts"
+        create_app(includes="mock_main.py", main="mock_main:main", artifact_store=url)
+        assert len(list(Path("serve_dir/artifacts").glob("*/*.pyz"))) == 1
+        old_bytes = Path("app.pyz").read_bytes()
+        Path("app.pyz").unlink()
+        create_app(includes="mock_main.py", main="mock_main:main", artifact_store=url)
+        assert Path("app.pyz").read_bytes() == old_bytes
+        with ZipFile("app.pyz") as zf:
+            config = json.loads(zf.read("zipapps_config.json"))
+        # the credentials in the url are not shipped
+        assert "artifact_store" not in config, config
+    finally:
+        server.shutdown()
+        server.close()
+    try:
+        ArtifactStore()
+        raise AssertionError("ArtifactStore should be abstract")
+    except TypeError:
+        pass
+    # the unpinned requirements skip the store
+    Path("requirements.txt").write_text("six==1.16.0\n-r requirements2.txt\n")
+    Path("requirements2.txt").write_text("bottle>=0.12 # comment\n")
+    app = ZipApp(pip_args=["-r", "requirements.txt", "-i", "https://pypi.org/simple"])
+    assert app.get_unpinned_requirements() == ["bottle>=0.12"]
+    Path("requirements2.txt").write_text("bottle==0.13.1 --hash=sha256:abc\n")
+    assert app.get_unpinned_requirements() == []
+    assert ZipApp(pip_args=["six", "-U"]).get_unpinned_requirements() == ["six"]
+    assert ZipApp(pip_args=["six"], lazy_install=True).get_unpinned_requirements() == []
+
+
+def test_inspect():
+    # test --inspect / --measure / --inspect-json
+    import json
+
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").write_text("import json")
+    (mock_dir / "mock.cpython-311-x86_64-linux-gnu.so").write_bytes(b"0" * 1000)
+    Path("mock_main.py").write_text("print(1)")
+    create_app(includes="mock_pkg,mock_main.py", unzip="AUTO", compressed=True)
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-m",
+            "zipapps",
+            "--inspect",
+            "app.pyz",
+            "--measure",
+            "--inspect-json",
+            "-",
+        ]
+    )
+    report = json.loads(output)
+    packages = {i["name"]: i for i in report["packages"]}
+    assert packages["mock_pkg"]["native_size"] == 1000, packages
+    assert packages["mock_pkg"]["files"] == 2, packages
+    assert packages["mock_pkg"]["extract"] is True, packages
+    assert packages["mock_main"]["extract"] is False, packages
+    assert packages["mock_pkg"]["compressed_size"] < 1000, packages
+    assert packages["mock_main"]["import_time"] is not None, packages
+    assert packages["ensure_zipapps"]["internal"], packages
+    output = subprocess.check_output(
+        [sys.executable, "-m", "zipapps", "--inspect", "app.pyz"]
+    )
+    assert b"mock_pkg" in output and b"compressed" in output, output
+
+
+def test_watch():
+    # test --watch: rebuild while the includes changed
+    import time
+
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").write_text("def main():\n    print('v1')\n")
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "zipapps",
+            "-a",
+            "mock_pkg",
+            "-m",
+            "mock_pkg:main",
+            "-u",
+            "*",
+            "--watch",
+            "--watch-interval",
+            "0.1",
+        ],
+        stderr=subprocess.PIPE,
+    )
+    try:
+
+        def wait_output(expect, timeout=10):
+            output = b""
+            for _ in range(int(timeout * 10)):
+                time.sleep(0.1)
+                if Path("app.pyz").is_file():
+                    output = subprocess.run(
+                        [sys.executable, "app.pyz"], stdout=subprocess.PIPE
+                    ).stdout.strip()
+                    if output == expect:
+                        return output
+            return output
+
+        assert wait_output(b"v1") == b"v1"
+        (mock_dir / "__init__.py").write_text(
+            "from mock_pkg.sub import main\n"
+        )
+        (mock_dir / "sub.py").write_text("def main():\n    print('v2')\n")
+        # the unzipped cache should be refreshed too
+        assert wait_output(b"v2") == b"v2"
+    finally:
+        proc.terminate()
+        proc.wait()
+    # the includes with the same name, the changed file is copied from its own source
+    from zipapps.main import ZipApp
+
+    for name in ("src1", "src2"):
+        Path(name).mkdir()
+        Path(name, "utils.py").write_text(name)
+    app = ZipApp(includes="src1/utils.py,mock_pkg", cache_path="watch_cache")
+    app.ensure_args()
+    app.prepare_includes()
+    old = app.get_watch_snapshot(["src1/utils.py", "mock_pkg"])
+    app.includes = "src2/utils.py,mock_pkg"
+    new = app.get_watch_snapshot(["src2/utils.py", "mock_pkg"])
+    assert app.sync_includes(old, new) == 1
+    assert Path("watch_cache/utils.py").read_text() == "src2"
+    # the custom cache_path is not cleared for the requirements
+    Path("requirements.txt").write_text("")
+    app = ZipApp(cache_path="watch_cache", pip_args=["-r", "requirements.txt"])
+    try:
+        app.watch()
+        raise AssertionError("watch should fail with the custom cache_path")
+    except RuntimeError:
+        pass
+    assert Path("watch_cache/utils.py").is_file()
+
+
+def test_compile_versions():
+    # test --compile-versions: load the version-tagged .pyc from the zip
+    import importlib.util
+    from zipfile import ZipFile
+
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").write_text(
+        "def main():\n    from mock_pkg import sub\n"
+        "    print(__file__, type(__loader__).__name__, sub.name)\n"
+    )
+    (mock_dir / "sub.py").write_text("name = type(__loader__).__name__\n")
+    app_path = create_app(
+        includes="mock_pkg",
+        main="mock_pkg:main",
+        compile_versions=f"{sys.executable},3.99",
+    )
+    pyc_name = Path(importlib.util.cache_from_source("mock_pkg/__init__.py"))
+    with ZipFile(app_path) as zf:
+        assert pyc_name.as_posix() in zf.namelist()
+    shutil.rmtree(mock_dir)
+    output = subprocess.check_output([sys.executable, str(app_path)])
+    assert output.strip().endswith(b"__init__.py ZipappsImporter ZipappsImporter")
+    # the path hook is installed once for the repeated activations
+    code = (
+        "import sys;from zipapps import activate;count = len(sys.path_hooks);"
+        "[activate('app.pyz', force=True) for _ in range(3)];"
+        "print(len(sys.path_hooks) - count)"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code])
+    assert output.strip() == b"1", output
+
+
+def test_unzip_workers():
+    # test ZIPAPPS_UNZIP_WORKERS: extract the members with a thread pool
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    for index in range(100):
+        sub_dir = mock_dir / f"sub{index % 5}"
+        sub_dir.mkdir(parents=True, exist_ok=True)
+        (sub_dir / f"file{index}.txt").write_text(str(index) * index)
+    (mock_dir / "__init__.py").touch()
+    app_path = create_app(includes="mock_pkg", unzip="*", chmod="777")
+    for workers in ("1", "4"):
+        shutil.rmtree("zipapps_cache", ignore_errors=True)
+        env = dict(os.environ, ZIPAPPS_UNZIP_WORKERS=workers)
+        subprocess.check_call(
+            [sys.executable, str(app_path), "--activate-zipapps"], env=env
+        )
+        cache_dir = Path("zipapps_cache/app/mock_pkg")
+        for path in mock_dir.rglob("*.txt"):
+            target = cache_dir / path.relative_to(mock_dir)
+            assert target.read_text() == path.read_text(), target
+            if os.name != "nt":
+                assert target.stat().st_mode & 0o777 == 0o777, target
+        assert list(Path("zipapps_cache/app").glob("_zip_time_*"))
+
+
+def test_unzip_lock():
+    # test the cache folder is extracted once by the concurrent processes
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    for index in range(50):
+        (mock_dir / f"mod{index}.py").write_text(f"value = {index}\n")
+    (mock_dir / "__init__.py").touch()
+    code = "import mock_pkg.mod49 as m, os; print(m.value, len(os.listdir(os.path.dirname(m.__file__))))"
+    for _ in range(2):
+        app_path = create_app(includes="mock_pkg", unzip="*")
+        procs = [
+            subprocess.Popen(
+                [sys.executable, str(app_path), "-c", code], stdout=subprocess.PIPE
+            )
+            for _ in range(8)
+        ]
+        for proc in procs:
+            assert proc.communicate()[0].strip() == b"49 51"
+            assert proc.returncode == 0
+        # the staging folders are cleaned after publishing
+        names = {path.name for path in Path("zipapps_cache").iterdir()}
+        assert names == {"app"}, names
+        assert len(list(Path("zipapps_cache/app").glob("_zip_time_*"))) == 1
+        (mock_dir / "mod0.py").write_text("value = -1\n")
+    # the unsafe member names are not extracted out of the cache folder
+    from zipfile import ZipFile
+
+    shutil.rmtree("zipapps_cache")
+    with ZipFile(app_path, "a") as zf:
+        zf.writestr("../evil.txt", "evil")
+    proc = subprocess.run(
+        [sys.executable, str(app_path), "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert proc.stdout.strip() == b"49 51", proc.stderr
+    assert b"skip the unsafe member '../evil.txt'" in proc.stderr, proc.stderr
+    assert not Path("zipapps_cache/evil.txt").exists()
+
+
+def test_unzip_diff():
+    # test only the changed files are extracted for the new build
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    for name in ("same", "changed", "removed"):
+        (mock_dir / f"{name}.py").write_text(f"value = {name!r}\n")
+    (mock_dir / "__init__.py").touch()
+    cache_dir = Path("zipapps_cache/app/mock_pkg")
+    app_path = create_app(includes="mock_pkg", unzip="*")
+    subprocess.check_call([sys.executable, str(app_path), "--activate-zipapps"])
+    same_stat = (cache_dir / "same.py").stat()
+    changed_stat = (cache_dir / "changed.py").stat()
+    (mock_dir / "changed.py").write_text("value = 'new'\n")
+    (mock_dir / "removed.py").unlink()
+    (mock_dir / "added.py").write_text("value = 'added'\n")
+    app_path = create_app(includes="mock_pkg", unzip="*")
+    code = "import mock_pkg.changed as m; print(m.value)"
+    output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+    assert output.strip() == b"new", output
+    assert (cache_dir / "same.py").stat().st_ino == same_stat.st_ino
+    assert (cache_dir / "changed.py").stat().st_ino != changed_stat.st_ino
+    assert (cache_dir / "added.py").is_file()
+    assert not (cache_dir / "removed.py").exists()
+
+
+def test_unzip_lazy():
+    # test unzip=LAZY: the extensions are unzipped at the first import
+    import _json
+    from importlib.machinery import EXTENSION_SUFFIXES
+
+    if not getattr(_json, "__file__", None):
+        # builtin module
+        return
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").touch()
+    (mock_dir / "native.py").write_text("from mock_pkg import _json\n")
+    ext_name = "_json" + EXTENSION_SUFFIXES[0]
+    shutil.copy(_json.__file__, mock_dir / ext_name)
+    (mock_dir / "unused").mkdir()
+    shutil.copy(_json.__file__, mock_dir / "unused" / ext_name)
+    app_path = create_app(includes="mock_pkg", unzip="LAZY")
+    cache_dir = Path("zipapps_cache/app/mock_pkg")
+    code = "import mock_pkg.native as m; print(m._json.__file__)"
+    for _ in range(2):
+        output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+        assert Path(output.strip().decode()) == (cache_dir / ext_name).absolute()
+    assert not (cache_dir / "unused").exists()
+    assert not (cache_dir / "native.py").exists()
+    # only the libs the extension links against
+    try:
+        import _bz2
+    except ImportError:
+        return
+    _clean_paths(root=False)
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").touch()
+    shutil.copy(_bz2.__file__, mock_dir / ("_bz2" + EXTENSION_SUFFIXES[0]))
+    for name in ("mock_pkg.libs/libbz2.so.1.0", "other.libs/libother.so"):
+        Path(name).parent.mkdir(exist_ok=True)
+        Path(name).write_bytes(b"mock")
+    app_path = create_app(includes="mock_pkg,mock_pkg.libs,other.libs", unzip="LAZY")
+    subprocess.check_call([sys.executable, str(app_path), "-c", "import mock_pkg._bz2"])
+    if sys.platform.startswith("linux"):
+        assert Path("zipapps_cache/app/mock_pkg.libs/libbz2.so.1.0").is_file()
+    assert not Path("zipapps_cache/app/other.libs").exists()
+
+
+def test_mmap_reader():
+    # test --mmap: read the members from the memory-mapped .pyz file
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").write_text("value = 1\n")
+    (mock_dir / "data.txt").write_text("data")
+    code = (
+        "import os, pkgutil, mock_pkg;"
+        "key = os.path.join('mock_pkg', 'data.txt');"
+        "print(type(mock_pkg.__loader__._read_member(key)).__name__,"
+        " pkgutil.get_data('mock_pkg', 'data.txt').decode(), mock_pkg.value)"
+    )
+    for compressed, name in ((False, b"memoryview"), (True, b"bytes")):
+        app_path = create_app(
+            includes="mock_pkg", mmap_reader=True, compressed=compressed
+        )
+        output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+        assert output.split() == [name, b"data", b"1"], output
+
+
+def test_unzip_memfd():
+    # test unzip=MEMFD: load the extensions from memory without the cache folder
+    import _json
+    from importlib.machinery import EXTENSION_SUFFIXES
+
+    if not getattr(_json, "__file__", None):
+        # builtin module
+        return
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").touch()
+    shutil.copy(_json.__file__, mock_dir / ("_json" + EXTENSION_SUFFIXES[0]))
+    app_path = create_app(includes="mock_pkg", unzip="MEMFD")
+    code = "from mock_pkg import _json; print(_json.__file__, _json.make_scanner)"
+    output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+    if hasattr(os, "memfd_create"):
+        assert output.startswith(b"/proc/self/fd/"), output
+        assert not Path("zipapps_cache").exists()
+    else:
+        assert Path("zipapps_cache").is_dir()
+
+
+def test_trace():
+    # test ZIPAPPS_TRACE: append the startup phases as Chrome trace events
+    _clean_paths(root=False)
+    import json
+
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").write_text("def main(): print('ok')\n")
+    app_path = create_app(includes="mock_pkg", main="mock_pkg:main", unzip="*")
+    trace_path = Path("trace.json")
+    env = dict(os.environ, ZIPAPPS_TRACE=str(trace_path))
+    try:
+        for _ in range(2):
+            output = subprocess.check_output([sys.executable, str(app_path)], env=env)
+            assert output.strip() == b"ok", output
+        text = trace_path.read_text()
+        events = json.loads(text.rstrip().rstrip(",") + "]")
+        names = {event["name"] for event in events}
+        for name in ("activate", "prepare_path", "unzip_cache_folder", "main"):
+            assert name in names, names
+        imports = {event["name"] for event in events if event["cat"] == "import"}
+        assert "mock_pkg" in imports, imports
+        assert len({event["pid"] for event in events}) == 2
+    finally:
+        trace_path.unlink()
+
+
+def test_bytecode_cache():
+    # test --bytecode-cache: load the code objects compiled by the previous process
+    _clean_paths(root=False)
+    import hashlib
+    import marshal
+
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").write_text("value = 1\n")
+    app_path = create_app(includes="mock_pkg", bytecode_cache=True)
+    # nothing unzipped, the cache is saved in the TEMP folder instead of the CWD
+    key = hashlib.md5(str(app_path.absolute()).encode("utf-8")).hexdigest()[:16]
+    cache_root = Path(gettempdir(), "zipapps_cache", f"app_{key}", "_zipapps_pyc")
+    shutil.rmtree(cache_root.as_posix(), ignore_errors=True)
+    code = "import mock_pkg; print(mock_pkg.value, mock_pkg.__file__)"
+    output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+    assert output.split()[0] == b"1", output
+    assert output.split()[1].endswith(b"__init__.py"), output
+    assert not Path("zipapps_cache").exists()
+    cache_paths = list(cache_root.glob("*/mock_pkg/__init__.py.*.pyc"))
+    assert len(cache_paths) == 1, cache_paths
+    # the cached code object is used instead of the source
+    cache_path = cache_paths[0]
+    data = cache_path.read_bytes()
+    mock_code = compile("value = 2\n", "mock.py", "exec")
+    cache_path.write_bytes(data[:12] + marshal.dumps(mock_code))
+    output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+    assert output.split()[0] == b"2", output
+    # the entries of the old archive are evicted
+    (mock_dir / "__init__.py").write_text("value = 3\n")
+    app_path = create_app(includes="mock_pkg", bytecode_cache=True)
+    output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+    assert output.split()[0] == b"3", output
+    assert not cache_path.parent.parent.exists()
+    assert len(list(cache_root.glob("*/mock_pkg/__init__.py.*.pyc"))) == 1
+
+
+def test_warm_start():
+    # test the warm start: only check the `_zip_time_` file and set sys.path
+    _clean_paths(root=False)
+    from zipfile import ZipFile
+
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").touch()
+    app_path = create_app(includes="mock_pkg", unzip="mock_pkg")
+    code = "import sys, mock_pkg; print('pathlib' in sys.modules, mock_pkg.__file__)"
+    output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+    assert output.split()[0] == b"True", output
+    output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+    assert output.split()[0] == b"False", output
+    assert b"zipapps_cache" in output.split()[1], output
+    # the env of the build args needs the full work
+    env = dict(os.environ, ZIPAPPS_UNZIP_EXCLUDE="")
+    output = subprocess.check_output(
+        [sys.executable, str(app_path), "-c", code], env=env
+    )
+    assert output.split()[0] == b"True", output
+    # the args need more work at startup
+    app_path = create_app(includes="mock_pkg", unzip="mock_pkg", mmap_reader=True)
+    with ZipFile(app_path) as zf:
+        assert "ensure_zipapps_fast.py" not in zf.namelist()
+
+
+def test_unzip_store():
+    # test --unzip-store: the same files of the apps are extracted once and linked
+    _clean_paths(root=False)
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").write_text("value = 1\n")
+    code = "import mock_pkg; print(mock_pkg.value, mock_pkg.__file__)"
+    for name in ("app1", "app2"):
+        app_path = create_app(
+            includes="mock_pkg",
+            unzip="*",
+            unzip_store="$CWD/zipapps_store",
+            output=f"{name}.pyz",
+        )
+        output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+        assert output.split()[0] == b"1", output
+        assert f"zipapps_cache/{name}/mock_pkg".encode() in output, output
+    stats = [
+        Path(f"zipapps_cache/{name}/mock_pkg/__init__.py").stat()
+        for name in ("app1", "app2")
+    ]
+    assert stats[0].st_ino == stats[1].st_ino, stats
+    objects = [path for path in Path("zipapps_store").glob("**/*") if path.is_file()]
+    assert len([path for path in objects if path.read_bytes() == b"value = 1\n"]) == 1
+    assert not Path("zipapps_cache/app1/_zipapps_store.json").exists()
+
+
+def test_cache_gc():
+    # test zipapps.caching: remove the expired cache folders not in use
+    _clean_paths(root=False)
+    import json
+    import time
+
+    from zipapps.caching import collect_garbage, scan_cache
+
+    mock_dir = Path("mock_pkg")
+    mock_dir.mkdir()
+    (mock_dir / "__init__.py").touch()
+    for name in ("app1", "app2"):
+        app_path = create_app(includes="mock_pkg", unzip="*", output=f"{name}.pyz")
+        subprocess.check_call([sys.executable, str(app_path), "-c", "import mock_pkg"])
+    # app2 is running
+    proc = subprocess.Popen(
+        [sys.executable, "app2.pyz", "-c", "print('ready', flush=True); input()"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        assert proc.stdout.readline().strip() == b"ready"
+        old_time = time.time() - 3 * 86400
+        for ts_path in Path("zipapps_cache").glob("*/_zip_time_*"):
+            os.utime(ts_path, (old_time, old_time))
+        entries = {entry["name"]: entry for entry in scan_cache("zipapps_cache")}
+        assert not entries["app1"]["in_use"] and entries["app2"]["in_use"], entries
+        # the same report of the main CLI
+        output = subprocess.check_output(
+            [sys.executable, "-m", "zipapps", "--cache-gc", "zipapps_cache"]
+            + ["--cache-max-age", "1d", "--cache-gc-dry-run", "--cache-gc-json", "-"]
+        )
+        report = json.loads(output)
+        assert report["dry_run"] and len(report["removed"]) == 1, report
+        assert Path("zipapps_cache/app1").is_dir()
+        removed = collect_garbage("zipapps_cache", max_age="1d")
+        assert [entry["name"] for entry in removed] == ["app1"], removed
+        assert not Path("zipapps_cache/app1").exists()
+        assert Path("zipapps_cache/app2").is_dir()
+    finally:
+        proc.communicate(b"\n")
+    # the runtime policy after extracting
+    app_path = create_app(
+        includes="mock_pkg", unzip="*", output="app3.pyz", cache_max_age="1d"
+    )
+    subprocess.check_call([sys.executable, str(app_path), "-c", "import mock_pkg"])
+    names = {path.name for path in Path("zipapps_cache").iterdir()}
+    assert names == {"app3"}, names
+
+
+def test_lazy_install_uv():
+    # the fake uv records the args and installs the module into the target
+    _clean_paths(root=False)
+    if os.name == "nt":
+        return
+    fake_uv = _make_fake_uv()
+    try:
+        app_path = create_app(
+            output="app.pyz",
+            lazy_install=True,
+            pip_args=["mock_uv_pkg"],
+            uv_path=str(fake_uv.absolute()),
+        )
+        output = subprocess.check_output(
+            [sys.executable, str(app_path), "-c", "import mock_uv_pkg;print(mock_uv_pkg.args)"]
+        ).decode()
+        assert "'pip', 'install', '--python'" in output, output
+        assert "--no-cache-dir" not in output, output
+        # the bundled uv in the cache folder, the mode is restored after unzipping
+        app_path = create_app(
+            output="app.pyz",
+            includes=str(fake_uv),
+            unzip="mock_uv",
+            lazy_install=True,
+            pip_args=["mock_uv_pkg"],
+            uv_path="mock_uv",
+        )
+        fake_uv.unlink()
+        output = subprocess.check_output(
+            [sys.executable, str(app_path), "-c", "import mock_uv_pkg;print(mock_uv_pkg.args)"]
+        ).decode()
+        assert sys.executable in output, output
+    finally:
+        _clean_paths(root=False)
+
+
+def test_wheelhouse():
+    # the bundled wheels are unpacked without pip while running
+    from zipfile import ZipFile
+
+    _clean_paths(root=False)
+    wheel_path = _make_wheel(
+        "mock_wheel_pkg",
+        "1.0",
+        files={
+            "mock_wheel_pkg/__init__.py": "name = 'mock_wheel_pkg'\n"
+            "def main():\n    print(name)\n",
+            "mock_wheel_pkg-1.0.data/purelib/mock_wheel_data.py": "",
+        },
+        entry_points="[console_scripts]\nmock-wheel-cli = mock_wheel_pkg:main\n",
+    )
+    app_path = create_app(
+        lazy_install=True,
+        pip_args=[str(wheel_path.absolute()), "--no-index"],
+        wheelhouse="3.8-win_amd64,native",
+    )
+    with ZipFile(app_path) as zf:
+        names = zf.namelist()
+    assert (
+        names.count(
+            "_zipapps_lazy_pip/_zipapps_wheelhouse/mock_wheel_pkg-1.0-py3-none-any.whl"
+        )
+        == 1
+    ), names
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            str(app_path),
+            "-c",
+            "import sys, mock_wheel_pkg, mock_wheel_data;print(mock_wheel_pkg.__file__, 'pip' in sys.modules)",
+        ]
+    ).decode()
+    assert "_zipapps_lazy_pip" in output and output.strip().endswith("False"), output
+    # the console scripts of the entry_points.txt
+    script = Path(output.split()[0]).parent.parent / "bin" / "mock-wheel-cli"
+    assert script.is_file(), output
+    if os.name != "nt":
+        env = dict(os.environ, PYTHONPATH=str(script.parent.parent))
+        output = subprocess.check_output([str(script)], env=env)
+        assert output.strip() == b"mock_wheel_pkg", output
+    _clean_paths(root=False)
+
+
+def test_lazy_install_lock():
+    # the processes starting at the same time wait for the only lazy install
+    _clean_paths(root=False)
+    if os.name == "nt":
+        return
+    fake_uv = _make_fake_uv(sleep=1)
+    app_path = create_app(
+        lazy_install=True,
+        pip_args=["mock_uv_pkg"],
+        uv_path=str(fake_uv.absolute()),
+    )
+    procs = [
+        subprocess.Popen(
+            [sys.executable, str(app_path), "-c", "import mock_uv_pkg;print(mock_uv_pkg.ok)"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        for _ in range(4)
+    ]
+    outputs = [proc.communicate() for proc in procs]
+    assert all(proc.returncode == 0 for proc in procs), outputs
+    assert all(stdout.strip() == b"1" for stdout, _ in outputs), outputs
+    calls = Path("mock_uv_calls.txt").read_text().splitlines()
+    # installed once into a staging folder, then renamed to the target
+    assert len(calls) == 1, calls
+    assert Path(calls[0]).name.startswith("."), calls
+    assert not Path(calls[0]).exists(), calls
+    assert any(b"Waiting for the lazy install" in stderr for _, stderr in outputs)
+    _clean_paths(root=False)
+
+
+def test_zipapps_warmup():
+    # extract, compile and fill the caches of the first run, then exit with the report
+    import json
+
+    _clean_paths(root=False)
+    mock_package = Path("mock_package")
+    mock_package.mkdir()
+    (mock_package / "__init__.py").write_text("name = 'mock_package'")
+    Path("mock_module.py").write_text("name = 'mock_module'")
+    app_path = create_app(
+        includes="mock_package,mock_module.py",
+        unzip="mock_package",
+        bytecode_cache=True,
+    )
+    output = subprocess.check_output(
+        [sys.executable, str(app_path), "--zipapps-warmup"]
+    )
+    report = json.loads(output)
+    cache_path = Path(report["cache_folder"])
+    assert cache_path == (test_path / "zipapps_cache" / "app").absolute(), report
+    assert report["compiled"] == 1 and not report["compile_failed"], report
+    assert list((cache_path / "mock_package" / "__pycache__").glob("*.pyc")), report
+    assert report["bytecode_cache"] >= 1, report
+    assert list(cache_path.glob("_zipapps_pyc/*/mock_module.py.*.pyc")), report
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            str(app_path),
+            "-c",
+            "import mock_package, mock_module;print(mock_package.__cached__)",
+        ]
+    )
+    assert output.strip().endswith(b".pyc"), output
+    _clean_paths(root=False)
+
+
+def test_lazy_install_incremental():
+    # only the changed distributions are installed after the pip_args changed
+    _clean_paths(root=False)
+    for name, version in [("mock_a", "1.0"), ("mock_b", "1.0"), ("mock_b", "2.0")]:
+        _make_wheel(name, version)
+    code = "import mock_a, mock_b;print(mock_a.__file__, mock_b.version)"
+    app_path = create_app(
+        lazy_install=True,
+        pip_args=["mock_a-1.0-py3-none-any.whl", "mock_b-1.0-py3-none-any.whl", "--no-index"],
+    )
+    output = subprocess.check_output([sys.executable, str(app_path), "-c", code])
+    # the output of pip at first
+    file_path, version = output.decode().splitlines()[-1].split()
+    assert version == "1.0", output
+    inode = os.stat(file_path).st_ino
+    app_path = create_app(
+        lazy_install=True,
+        pip_args=["mock_a-1.0-py3-none-any.whl", "mock_b-2.0-py3-none-any.whl", "--no-index"],
+    )
+    proc = subprocess.run(
+        [sys.executable, str(app_path), "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert proc.stdout.split()[-1] == b"2.0", proc
+    assert b"1 unchanged, 1 installed" in proc.stderr, proc.stderr
+    if os.name != "nt":
+        # hard linked from the old target
+        assert os.stat(file_path).st_ino == inode
+    _clean_paths(root=False)
+
+
+def test_upgrade_interval():
+    # `-U` upgrades only after the interval, in a detached process with upgrade_background
+    import time
+
+    _clean_paths(root=False)
+    if os.name == "nt":
+        return
+    fake_uv = _make_fake_uv()
+    calls_path = Path("mock_uv_calls.txt")
+
+    def count_calls():
+        return len(calls_path.read_text().splitlines()) if calls_path.is_file() else 0
+
+    app_path = create_app(
+        lazy_install=True,
+        pip_args=["-U", "mock_uv_pkg"],
+        uv_path=str(fake_uv.absolute()),
+        upgrade_interval="1h",
+    )
+    args = [sys.executable, str(app_path), "-c", "import mock_uv_pkg;print(mock_uv_pkg.ok)"]
+    for _ in range(2):
+        assert subprocess.check_output(args).strip() == b"1"
+    assert count_calls() == 1
+    # the upgrade is due
+    env = dict(os.environ, ZIPAPPS_UPGRADE_INTERVAL="0")
+    assert subprocess.check_output(args, env=env).strip() == b"1"
+    assert count_calls() == 2
+    env["ZIPAPPS_UPGRADE_BACKGROUND"] = "1"
+    # the running process imports after the background upgrade finished
+    code = (
+        "import sys;"
+        "print([p for p in sys.path if '_zipapps_lazy_pip' in p][0], flush=True);"
+        "input();"
+        "import mock_uv_pkg;"
+        "print(mock_uv_pkg.__file__)"
+    )
+    proc = subprocess.Popen(
+        [sys.executable, str(app_path), "-c", code],
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        old_target = Path(proc.stdout.readline().decode().strip())
+        for _ in range(100):
+            if count_calls() == 3:
+                break
+            time.sleep(0.1)
+        assert count_calls() == 3
+        # wait for the rename of the staging folder
+        lazy_dir = test_path / "zipapps_cache" / "app" / "_zipapps_lazy_pip"
+        for _ in range(100):
+            if not list(lazy_dir.glob(".*.tmp")):
+                break
+            time.sleep(0.1)
+        # the upgrade is installed into a new version, the held one is kept
+        assert len([path for path in lazy_dir.iterdir() if path.is_dir()]) == 2
+        output = subprocess.check_output(
+            args, env=dict(env, ZIPAPPS_UPGRADE_INTERVAL="1h")
+        )
+        assert output.strip() == b"1"
+        assert old_target.is_dir()
+    finally:
+        stdout, _ = proc.communicate(b"\n")
+    assert Path(stdout.decode().strip()).parent == old_target, stdout
+    # the old versions not held are removed by the next process
+    subprocess.check_call(args)
+    assert not old_target.exists()
+    assert len([path for path in lazy_dir.iterdir() if path.is_dir()]) == 1
+    _clean_paths(root=False)
+
+
+def test_activate_many():
+    # test --zipapps with many env paths, activated together
+    _clean_paths(root=False)
+    for name in ("env1", "env2", "env3"):
+        package = Path(name) / "shared_mod"
+        package.mkdir(parents=True)
+        (package / "__init__.py").write_text(f"NAME = {name!r}")
+        create_app(
+            includes=package.as_posix(),
+            output=f"{name}.pyz",
+            unzip="*" if name != "env2" else "",
+        )
+    create_app(output="main.pyz")
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "main.pyz",
+            "--zipapps=env1.pyz,env2.pyz,env3.pyz",
+            "-c",
+            "import os, sys, shared_mod;print(shared_mod.NAME);"
+            "print([os.path.basename(p) for p in sys.path[:3]]);"
+            "print([os.path.basename(p) for p in os.environ['PYTHONPATH'].split(os.pathsep)[:4]])",
+        ]
+    ).decode()
+    # the later one comes first, the same as activating one by one
+    name, paths, python_paths = output.splitlines()[-3:]
+    assert name == "env3", output
+    assert paths == "['env3', 'env3.pyz', 'env2.pyz']", output
+    assert python_paths == "['env3', 'env3.pyz', 'env2.pyz', 'env1']", output
+    assert Path("zipapps_cache/env1/shared_mod/__init__.py").is_file()
+    # the API, the warm start and the duplicated paths
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import sys;from zipapps import activate_many;"
+            "activate_many(['env3.pyz', 'env1.pyz', './env3.pyz']);"
+            "import shared_mod;print(shared_mod.NAME)",
+        ]
+    ).decode()
+    assert output.strip() == "env1", output
+
+
+def test_activate_registry():
+    # test the repeated / concurrent activate calls
+    _clean_paths(root=False)
+    package = Path("registry_mod")
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    create_app(includes=package.as_posix(), output="registry.pyz", unzip="*")
+    code = r"""
+import os, sys
+from concurrent.futures import ThreadPoolExecutor
+from zipapps import activate_zipapps
+
+calls = []
+_activate = activate_zipapps._activate
+activate_zipapps._activate = lambda path_str: calls.append(path_str) or _activate(path_str)
+with ThreadPoolExecutor(8) as executor:
+    list(executor.map(activate_zipapps.activate, ["registry.pyz"] * 16))
+print(len(calls))
+cache_path = os.path.abspath("zipapps_cache/registry")
+sys.path.remove(cache_path)
+activate_zipapps.activate("./registry.pyz")
+print(cache_path in sys.path)
+activate_zipapps.activate("registry.pyz", force=True)
+print(cache_path in sys.path, len(calls))
+# the rebuilt archive
+stat = os.stat("registry.pyz")
+os.utime("registry.pyz", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+activate_zipapps.activate_many(["registry.pyz"])
+activate_zipapps.activate("registry.pyz")
+print(len(calls))
+# one fd per cache folder for the repeated activations
+fd_count = lambda: len(os.listdir("/proc/self/fd")) if sys.platform == "linux" else 0
+count = fd_count()
+for _ in range(3):
+    activate_zipapps.activate("registry.pyz", force=True)
+print(len(activate_zipapps._held_folders), fd_count() == count)
+"""
+    output = subprocess.check_output([sys.executable, "-c", code]).decode()
+    held = "0" if os.name == "nt" else "1"
+    assert output.split() == ["1", "False", "True", "2", "2", held, "True"], output
+
+
 if hasattr(os, "fork"):
 
     def test_multiprocessing():
@@ -199,7 +199,7 @@ def main():
         "-u",
         default="",
         help='The names which need to be unzipped while running, splited by "," '
-        '`without ext`, such as `bottle,aiohttp`, or the complete path like `bin/bottle.py,temp.py`. For `.so/.pyd` files(which can not be loaded by zipimport), or packages with operations of static files. if unzip is set to "*", then will unzip all files and folders. if unzip is set to **AUTO**, then will add the `.pyd` and `.so` files automatically. Can be overwrite with environment variable `ZIPAPPS_UNZIP`',
+        '`without ext`, such as `bottle,aiohttp`, or the complete path like `bin/bottle.py,temp.py`. For `.so/.pyd` files(which can not be loaded by zipimport), or packages with operations of static files. if unzip is set to "*", then will unzip all files and folders. if unzip is set to **AUTO**, then will add the `.pyd` and `.so` files automatically. if unzip is set to **LAZY**, then the `.pyd` and `.so` files will be unzipped at the first import. if unzip is set to **MEMFD**, then the `.so` files will be loaded from memory without unzipping (linux only, or fall back to LAZY). Can be overwrite with environment variable `ZIPAPPS_UNZIP`',
     )
     parser.add_argument(
         "--unzip-exclude",
@@ -222,8 +222,84 @@ def main():
         "--compiled",
         action="store_true",
         dest="compiled",
-        help="Compile .py to .pyc for fast import, but zipapp does not work "
-        "unless you unzip it.",
+        help="Compile .py to .pyc for fast import, the .pyc files in the zip will be"
+        " loaded by the zipapps importer while running.",
+    )
+    parser.add_argument(
+        "--compile-versions",
+        default="",
+        dest="compile_versions",
+        help="Compile .py to the version-tagged .pyc files for each given python version"
+        " (or interpreter path), separated by commas, such as `3.9,3.11,/usr/bin/python3.12`."
+        " The matching bytecode in the zip will be loaded while running, other versions fall back to the source.",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        dest="mmap_reader",
+        help="Read the modules and data files from the memory-mapped `.pyz` file while running,"
+        " instead of seeking and reading the file for each member."
+        " Can be overwrite with environment variable `ZIPAPPS_MMAP`",
+    )
+    parser.add_argument(
+        "--bytecode-cache",
+        action="store_true",
+        dest="bytecode_cache",
+        help="Save the code objects compiled from the sources in the zip into the cache folder while running,"
+        " keyed by the archive identity, member name and CRC, so the later processes will not compile them again."
+        " Can be overwrite with environment variable `ZIPAPPS_BYTECODE_CACHE`",
+    )
+    parser.add_argument(
+        "--unzip-store",
+        "-us",
+        default="",
+        dest="unzip_store",
+        help="The content-addressed store shared by the apps on the host, such as `$HOME/.zipapps_store`."
+        " The `unzip` files are extracted into the store by the sha256 of the content,"
+        " then linked into the cache folder, so the same files of the apps are extracted only once."
+        " Can be overwrite with environment variable `ZIPAPPS_UNZIP_STORE`",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        default="",
+        dest="cache_max_size",
+        help="After extracting, remove the least recently used cache folders of the other apps"
+        " (and the lazy pip targets) in the same `unzip_path` until the total size is under it, such as `2G`."
+        " The folders in use are skipped. Can be overwrite with environment variable `ZIPAPPS_CACHE_MAX_SIZE`."
+        " Run `python -m zipapps --cache-gc zipapps_cache` to report / clean the cache manually.",
+    )
+    parser.add_argument(
+        "--cache-max-age",
+        default="",
+        dest="cache_max_age",
+        help="After extracting, remove the cache folders of the other apps (and the lazy pip targets)"
+        " not used for the given time, such as `30d`."
+        " The folders in use are skipped. Can be overwrite with environment variable `ZIPAPPS_CACHE_MAX_AGE`",
+    )
+    parser.add_argument(
+        "--wheelhouse",
+        default="",
+        dest="wheelhouse",
+        help="With the lazy install mode, download the wheels of the given targets into the .pyz,"
+        " such as `native,3.11-manylinux2014_x86_64,3.12-win_amd64` (`[python_version-]platform`)."
+        " While running, the wheels matching the python / platform are unpacked without pip and network,"
+        " falls back to pip if no target matched",
+    )
+    parser.add_argument(
+        "--upgrade-interval",
+        default="",
+        dest="upgrade_interval",
+        help="With the lazy install mode and `-U` in the pip args, only upgrade the requirements"
+        " if the last successful upgrade is older than it, such as `12h` / `1d`. Defaults to upgrading at every start."
+        " Can be overwrite with environment variable `ZIPAPPS_UPGRADE_INTERVAL`",
+    )
+    parser.add_argument(
+        "--upgrade-background",
+        action="store_true",
+        dest="upgrade_background",
+        help="Run the due upgrade of `--upgrade-interval` in a detached process,"
+        " the current process goes on with the installed requirements."
+        " Can be overwrite with environment variable `ZIPAPPS_UPGRADE_BACKGROUND`",
     )
     parser.add_argument(
         "--cache-path",
@@ -408,7 +484,105 @@ def main():
         "--uv",
         default="",
         dest="uv_path",
-        help="the executable path of python-uv, to speed up pip install",
+        help="the executable path of python-uv, to speed up pip install."
+        " With the lazy install mode, the uv is resolved while running (in the cache folder / $SELF / PATH),"
+        " falls back to pip",
+    )
+    parser.add_argument(
+        "--artifact-store",
+        default="",
+        dest="artifact_store",
+        help="The shared folder or `http(s)://` url to fetch / publish the built files,"
+        " keyed by the hash of all the build inputs. The `--serve` server can be used as `http://host:port/artifacts`.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        dest="watch",
+        help="Build the output file, then rebuild it while the `includes` changed."
+        " The prepared cache_path is kept, pip runs again only while the requirement files changed.",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        default=0.5,
+        type=float,
+        dest="watch_interval",
+        help="Only work while --watch is set, the interval seconds to check the changes, defaults to 0.5.",
+    )
+    parser.add_argument(
+        "--inspect",
+        default="",
+        dest="inspect",
+        help="Report the size / compression ratio / native-extension bytes / unzip or not"
+        " of each top-level package in the given .pyz file.",
+    )
+    parser.add_argument(
+        "--inspect-json",
+        default="",
+        dest="inspect_json",
+        help="Only work while --inspect is set, dump the report into JSON. A file path needed and `-` means stdout.",
+    )
+    parser.add_argument(
+        "--measure",
+        action="store_true",
+        dest="measure",
+        help="Only work while --inspect is set, measure the cold import time of each package from the .pyz file.",
+    )
+    parser.add_argument(
+        "--cache-gc",
+        default="",
+        dest="cache_gc",
+        help="Report the usage of the given cache folder (the same as `--unzip-path`, such as `zipapps_cache`),"
+        " and remove the entries not in use by `--cache-max-size` / `--cache-max-age`.",
+    )
+    parser.add_argument(
+        "--cache-gc-json",
+        default="",
+        dest="cache_gc_json",
+        help="Only work while --cache-gc is set, dump the report into JSON. A file path needed and `-` means stdout.",
+    )
+    parser.add_argument(
+        "--cache-gc-dry-run",
+        action="store_true",
+        dest="cache_gc_dry_run",
+        help="Only work while --cache-gc is set, only report the entries to be removed.",
+    )
+    parser.add_argument(
+        "--serve",
+        default="",
+        dest="serve",
+        help="Run a local build service on the given address, such as `127.0.0.1:8000`"
+        " or `unix:/tmp/zipapps.sock`, POST the JSON kwargs of ZipApp to `/build` and the .pyz file will be returned.",
+    )
+    parser.add_argument(
+        "--serve-dir",
+        default="",
+        dest="serve_dir",
+        help="Only work while --serve is set, the folder to store the built files,"
+        " defaults to `$TEMP/zipapps_serve`.",
+    )
+    parser.add_argument(
+        "--serve-workers",
+        default=0,
+        type=int,
+        dest="serve_workers",
+        help="Only work while --serve is set, the max number of build processes,"
+        " defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--serve-max-age",
+        default="7d",
+        dest="serve_max_age",
+        help="Only work while --serve is set, remove the built files and artifacts"
+        " not used for the given time, such as `12h` / `30d`, `0` means never. Defaults to `7d`.",
+    )
+    parser.add_argument(
+        "--serve-allow-remote",
+        action="store_true",
+        dest="serve_allow_remote",
+        help="Only work while --serve is set, allow the non-loopback addresses."
+        " The clients are able to read the files in the working folder and run the setup of pip packages,"
+        " only use it for the trusted network.",
     )
     if len(sys.argv) == 1:
         parser.print_help()
@@ -430,6 +604,34 @@ def main():
         for path in args.activate.split(","):
             activate(path)
         return
+    if args.inspect:
+        from .inspecting import inspect_cli
+
+        inspect_cli(args.inspect, measure=args.measure, json_path=args.inspect_json)
+        return
+    if args.cache_gc:
+        from .caching import cache_cli
+
+        if not Path(args.cache_gc).is_dir():
+            raise ValueError(f"{args.cache_gc} is not a folder.")
+        cache_cli(
+            args.cache_gc,
+            max_size=args.cache_max_size,
+            max_age=args.cache_max_age,
+            dry_run=args.cache_gc_dry_run,
+            json_path=args.cache_gc_json,
+        )
+        return
+    if args.serve:
+        from .serving import serve
+
+        return serve(
+            args.serve,
+            work_dir=args.serve_dir,
+            max_workers=args.serve_workers,
+            max_age=args.serve_max_age,
+            allow_remote=args.serve_allow_remote,
+        )
     if args.freeze:
         from .freezing import FreezeTool
 
@@ -469,6 +671,16 @@ def main():
             clear_zipapps_self=args.clear_zipapps_self,
             rm_patterns=args.rm_patterns,
             uv_path=args.uv_path,
+            artifact_store=args.artifact_store,
+            compile_versions=args.compile_versions,
+            mmap_reader=args.mmap_reader,
+            bytecode_cache=args.bytecode_cache,
+            unzip_store=args.unzip_store,
+            cache_max_size=args.cache_max_size,
+            cache_max_age=args.cache_max_age,
+            wheelhouse=args.wheelhouse,
+            upgrade_interval=args.upgrade_interval,
+            upgrade_background=args.upgrade_background,
         )
     if args.dump_config:
         config_json = json.dumps(app.kwargs)
@@ -477,6 +689,8 @@ def main():
         else:
             with open(args.dump_config, "w", encoding="utf-8") as f:
                 f.write(config_json)
+    elif args.watch:
+        return app.watch(interval=args.watch_interval)
     else:
         return app.build()
 
@@ -1,26 +1,457 @@
+import os
 import sys
-import zipfile
-from pathlib import Path
+import time
+from _thread import RLock
 
+# ZIPAPPS_TRACE=/path/trace.json, append the Chrome trace events of the startup phases
+TRACE_PATH = os.environ.get("ZIPAPPS_TRACE", "")
 
-def activate(path=None):
-    path = Path(path) if path else Path(__file__).parent
-    path_str = path.absolute().as_posix()
-    if zipfile.is_zipfile(path_str):
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = self.tracer.now()
+        return self
+
+    def __exit__(self, *args):
+        self.tracer.add(self.name, self.start, self.tracer.now(), self.args)
+        return False
+
+
+class Tracer(object):
+    """Collect the nested timings, then append them to the file as Chrome trace events at exit.
+
+    The file is in the JSON Array Format (the closing `]` is optional), so the processes can append to the same file.
+    Open it with chrome://tracing or https://ui.perfetto.dev
+    """
+
+    def __init__(self, path: str):
+        import atexit
+        import json
+        import threading
+
+        self.path = path
+        self.events = []
+        self._get_tid = threading.get_ident
+        # imported before tracing the imports
+        self._dumps = json.dumps
+        atexit.register(self.flush)
+
+    @staticmethod
+    def now():
+        return time.time() * 1e6
+
+    def span(self, name, args=None):
+        return _Span(self, name, args)
+
+    def add(self, name, start, end, args=None, cat="zipapps"):
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round(start, 1),
+            "dur": round(end - start, 1),
+            "pid": os.getpid(),
+            "tid": self._get_tid(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def instant(self, name, args=None):
+        event = {
+            "name": name,
+            "cat": "zipapps",
+            "ph": "i",
+            "s": "p",
+            "ts": round(self.now(), 1),
+            "pid": os.getpid(),
+            "tid": self._get_tid(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def _ensure_header(self):
+        if os.path.exists(self.path):
+            return
+        # create the file with the `[` atomically, the other processes may be appending
+        tmp_path = "%s.%s.tmp" % (self.path, os.getpid())
         try:
-            from zipimport import zipimporter
+            with open(tmp_path, "w") as f:
+                f.write("[\n")
+            os.link(tmp_path, self.path)
+        except OSError:
+            if not os.path.exists(self.path):
+                os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def flush(self):
+        pid = os.getpid()
+        # the forked processes inherit the events of the parent
+        events = [event for event in self.events if event["pid"] == pid]
+        self.events = []
+        if not events:
+            return
+        try:
+            self._ensure_header()
+            data = "".join(self._dumps(event) + ",\n" for event in events)
+            with open(self.path, "a") as f:
+                f.write(data)
+        except OSError as err:
+            sys.stderr.write(f"WARNING: write ZIPAPPS_TRACE failed for {err!r}\n")
+
+
+class _TracedLoader(object):
+    "Proxy of the loader to time the exec_module, the original loader is restored after importing."
+
+    def __init__(self, loader, tracer: Tracer):
+        self._loader = loader
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        create_module = getattr(self._loader, "create_module", None)
+        return create_module(spec) if create_module else None
+
+    def exec_module(self, module):
+        start = self._tracer.now()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            spec = getattr(module, "__spec__", None)
+            if spec is not None and spec.loader is self:
+                spec.loader = self._loader
+            if getattr(module, "__loader__", None) is self:
+                module.__loader__ = self._loader
+            self._tracer.add(module.__name__, start, self._tracer.now(), cat="import")
+
+
+class _ImportTracer(object):
+    "The first meta path finder, wraps the loaders found by the others."
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._finding = set()
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                find_spec = getattr(finder, "find_spec", None)
+                if finder is self or find_spec is None:
+                    continue
+                spec = find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.discard(fullname)
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TracedLoader(spec.loader, self.tracer)
+        return spec
+
+
+_tracer = None
+if TRACE_PATH:
+    _tracer = Tracer(TRACE_PATH)
+    sys.meta_path.insert(0, _ImportTracer(_tracer))
+
+
+def trace(name, **args):
+    "Context manager to record the duration, no-op without ZIPAPPS_TRACE."
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, args)
+
+
+def trace_instant(name, **args):
+    if _tracer is not None:
+        _tracer.instant(name, args)
 
-            importer = zipimporter(path_str)
+
+# the activated archives of this process, {realpath: (st_ino, st_mtime_ns)}
+_activated = dict()
+_activate_lock = RLock()
+# the `_zip_time_` files locked until exit, {path: fd}, one fd per cache folder for the repeated activations
+_held_folders = dict()
+# the last use time (mtime of the `_zip_time_` file) is updated at most once per minute
+TOUCH_INTERVAL = 60
+
+
+def hold_cache_folder(ts_path_str):
+    """Keep the shared lock of the `_zip_time_` file until exit, so `zipapps.caching` skips the folder in use.
+
+    Return False if the folder has been removed by the cache cleaner."""
+    if os.name == "nt":
+        # the folder in use can not be renamed by the cache cleaner
+        return os.path.isfile(ts_path_str)
+    ts_path_str = os.path.abspath(ts_path_str)
+    fd = _held_folders.get(ts_path_str)
+    if fd is None or not _is_same_file(ts_path_str, fd):
+        if fd is not None:
+            # removed or replaced by the new build
+            _held_folders.pop(ts_path_str, None)
+            os.close(fd)
+        fd = _lock_shared(ts_path_str)
+        if fd is None:
+            return False
+        old_fd = _held_folders.setdefault(ts_path_str, fd)
+        if old_fd != fd:
+            # held by the other thread
+            os.close(fd)
+    try:
+        if time.time() - os.stat(ts_path_str).st_mtime > TOUCH_INTERVAL:
+            os.utime(ts_path_str)
+    except OSError:
+        pass
+    return True
+
+
+def _is_same_file(path_str, fd):
+    try:
+        return os.path.samestat(os.stat(path_str), os.fstat(fd))
+    except OSError:
+        return False
+
+
+def _lock_shared(path_str):
+    "The fd of the file with the shared lock, None if it has been removed."
+    try:
+        fd = os.open(path_str, os.O_RDONLY)
+    except OSError:
+        return None
+    import fcntl
+
+    try:
+        # wait for the cache cleaner removing it
+        fcntl.flock(fd, fcntl.LOCK_SH)
+    except OSError:
+        # the file system without the flock support
+        pass
+    if not _is_same_file(path_str, fd):
+        os.close(fd)
+        return None
+    return fd
+
+
+def _get_identity(path_str):
+    "The (realpath, (st_ino, st_mtime_ns)) of the archive, a rebuilt archive is a new one."
+    try:
+        stat = os.stat(path_str)
+    except OSError:
+        return None, None
+    return os.path.realpath(path_str), (stat.st_ino, stat.st_mtime_ns)
+
+
+def _is_activated(real_path, identity):
+    return real_path is not None and _activated.get(real_path) == identity
+
+
+def _get_path_str(path=None):
+    # os.path instead of pathlib / zipfile, for the warm start
+    path_str = os.path.abspath(str(path) if path else os.path.dirname(__file__))
+    if os.sep != "/":
+        path_str = path_str.replace(os.sep, "/")
+    return path_str
+
+
+def activate(path=None, force=False):
+    """Activate the archive once per process, the repeated calls return immediately unless the archive is rebuilt.
+
+    `force` runs the activation again, to check the cache folder and restore the sys.path.
+    """
+    path_str = _get_path_str(path)
+    real_path, identity = _get_identity(path_str)
+    if not force and _is_activated(real_path, identity):
+        return
+    with _activate_lock:
+        # the other thread may have done it while waiting for the lock
+        if not force and _is_activated(real_path, identity):
+            return
+        with trace("activate", path=path_str):
+            _activate(path_str)
+        if real_path is not None:
+            _activated[real_path] = identity
+
+
+def activate_many(paths, max_workers=8, force=False):
+    """Activate the archives together, the same result as `activate` them one by one (the later one comes first in sys.path).
+
+    The cache folders are checked and extracted concurrently, then the lazy installs run one by one,
+    and sys.path / PYTHONPATH are rebuilt once at the end. The activated archives are skipped unless `force`.
+    """
+    with _activate_lock:
+        _activate_many(paths, max_workers, force)
+
+
+def _activate_many(paths, max_workers, force):
+    path_strs = []
+    seen = set()
+    for path in paths:
+        path_str = _get_path_str(path)
+        real_path, identity = _get_identity(path_str)
+        if real_path is None or real_path in seen or not os.path.isfile(path_str):
+            continue
+        seen.add(real_path)
+        if force or not _is_activated(real_path, identity):
+            path_strs.append(path_str)
+    if not path_strs:
+        return
+    with trace("activate_many", count=len(path_strs)):
+        states = [
+            dict(path=path_str, deferred=[], paths=None) for path_str in path_strs
+        ]
+        if len(states) > 1 and max_workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(min(len(states), max_workers)) as executor:
+                for future in [executor.submit(_prepare, state) for state in states]:
+                    future.result()
+        else:
+            for state in states:
+                _prepare(state)
+        for state in states:
+            for install in state["deferred"]:
+                install()
+        _update_sys_path([state["paths"] for state in states if state["paths"]])
+        for state in states:
+            if state.get("legacy"):
+                # built by the old version, not able to be activated concurrently
+                activate(state["path"], force=force)
+            elif state["paths"]:
+                real_path, identity = _get_identity(state["path"])
+                if real_path is not None:
+                    _activated[real_path] = identity
+
+
+def _prepare(state):
+    "Run the `ensure_zipapps` of the archive without updating sys.path, the result is set into the state."
+    from zipimport import ZipImportError, zipimporter
+
+    try:
+        importer = zipimporter(state["path"])
+    except ZipImportError:
+        # not a zip file
+        return
+    with trace("activate", path=state["path"]):
+        for name in ("ensure_zipapps_fast", "ensure_zipapps"):
             try:
-                spec = importer.find_spec("ensure_zipapps")
-                if spec and spec.loader:
-                    module = spec.loader.load_module("ensure_zipapps")
-                else:
-                    raise ImportError("Module not found")
-            except AttributeError:
-                module = importer.load_module("ensure_zipapps")
-            del module
-            sys.modules.pop("ensure_zipapps", None)
-        except ImportError as err:
-            sys.stderr.write(f"WARNING: activate failed for {err!r}\n")
-            raise err
+                code = importer.get_code(name)
+            except ImportError:
+                continue
+            if "_zipapps_batch" not in code.co_names:
+                state["legacy"] = True
+                return
+            module = type(sys)(name)
+            module.__file__ = importer.get_filename(name)
+            module.__loader__ = importer
+            module._zipapps_batch = state
+            module.hold_cache_folder = hold_cache_folder
+            exec(code, module.__dict__)
+            if getattr(module, "ready", True):
+                return
+
+
+def _update_sys_path(results):
+    "The same as the `update_sys_path` of each archive in order, but rebuild sys.path / PYTHONPATH once."
+    ignored = False
+    new_paths = []
+    for new_sys_paths, zipapps_path_list, ignore_system_python_path in reversed(
+        results
+    ):
+        new_paths.append((new_sys_paths, zipapps_path_list))
+        if ignore_system_python_path:
+            # the archives before it have been ignored too
+            ignored = True
+            break
+    if not new_paths:
+        return
+    old_paths = [] if ignored else sys.path
+    python_paths = []
+    front_paths = []
+    for new_sys_paths, zipapps_path_list in new_paths:
+        python_paths.extend(new_sys_paths + zipapps_path_list)
+        # let the dir path first
+        front_paths.extend(new_sys_paths)
+        front_paths.extend(path for path in zipapps_path_list if path not in old_paths)
+    if not ignored:
+        python_paths.append(os.environ.get("PYTHONPATH") or "")
+    os.environ["PYTHONPATH"] = os.pathsep.join(python_paths)
+    seen_path = set()
+    result = []
+    for path in front_paths + old_paths:
+        if path not in seen_path:
+            seen_path.add(path)
+            result.append(path)
+    sys.path = result
+
+
+def warmup(path=None):
+    """Run the full work of `ensure_zipapps` (extraction / lazy install) without the warm start,
+    then compile the bytecode and fill the caches for the first run. Return the report dict.
+    """
+    path_str = _get_path_str(path)
+    from zipimport import zipimporter
+
+    with trace("warmup", path=path_str):
+        return _load_module(zipimporter(path_str), "ensure_zipapps").warmup()
+
+
+def _load_module(importer, name):
+    code = importer.get_code(name)
+    module = type(sys)(name)
+    module.__file__ = importer.get_filename(name)
+    module.__loader__ = importer
+    module.hold_cache_folder = hold_cache_folder
+    exec(code, module.__dict__)
+    return module
+
+
+def _activate(path_str):
+    if not os.path.isfile(path_str):
+        return
+    from zipimport import ZipImportError, zipimporter
+
+    try:
+        importer = zipimporter(path_str)
+    except ZipImportError:
+        # not a zip file
+        return
+    try:
+        try:
+            # only check the cache folder and set sys.path if possible
+            ready = _load_module(importer, "ensure_zipapps_fast").ready
+        except ImportError:
+            # not available for the build args, or built by the old version
+            ready = False
+        if not ready:
+            _load_module(importer, "ensure_zipapps")
+    except ImportError as err:
+        sys.stderr.write(f"WARNING: activate failed for {err!r}\n")
+        raise err
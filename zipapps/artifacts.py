@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Content-addressed stores for the built `.pyz` files, shared by the parallel builders.
+
+ArtifactStore.from_uri("/mnt/shared/zipapps_artifacts")
+ArtifactStore.from_uri("http://127.0.0.1:8000/artifacts")
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import typing
+from abc import ABC, abstractmethod
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+class ArtifactStore(ABC):
+    """Fetch and publish the built files by the hash of the build inputs."""
+
+    SUFFIX = ".pyz"
+    KEY_REGEX = re.compile(r"^[0-9a-f]{8,128}$")
+
+    @classmethod
+    def from_uri(cls, uri: typing.Union[str, "ArtifactStore"]) -> "ArtifactStore":
+        if isinstance(uri, ArtifactStore):
+            return uri
+        if uri.startswith(("http://", "https://")):
+            return HTTPArtifactStore(uri)
+        if uri.startswith("file://"):
+            uri = uri[len("file://") :]
+        return DirectoryArtifactStore(uri)
+
+    @classmethod
+    def check_key(cls, key: str):
+        if not cls.KEY_REGEX.match(key):
+            raise ValueError(f"invalid artifact key: {key!r}")
+        return key
+
+    @staticmethod
+    def _replace_from(source: typing.BinaryIO, target: Path):
+        # write to a temp file in the same folder, then publish it atomically
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f".{target.name}.", suffix=".tmp", dir=target.parent
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(source, f)
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @abstractmethod
+    def get(self, key: str, target: Path) -> bool:
+        "Copy the artifact to target, return False if it is not exist."
+
+    @abstractmethod
+    def put(self, key: str, source: Path) -> bool:
+        "Publish the source file, return False if it is already exist."
+
+
+class DirectoryArtifactStore(ArtifactStore):
+    def __init__(self, root: typing.Union[str, Path]):
+        self.root = Path(root)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.root.as_posix()!r})"
+
+    def get_path(self, key: str) -> Path:
+        key = self.check_key(key)
+        return self.root / key[:2] / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str, target: Path) -> bool:
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as f:
+                self._replace_from(f, Path(target))
+        except FileNotFoundError:
+            return False
+        try:
+            # the last use time, for the cleaner of the shared folder
+            os.utime(path)
+        except OSError:
+            pass
+        return True
+
+    def put(self, key: str, source: Path) -> bool:
+        path = self.get_path(key)
+        if path.is_file():
+            return False
+        with open(source, "rb") as f:
+            self._replace_from(f, path)
+        return True
+
+
+class HTTPArtifactStore(ArtifactStore):
+    """`GET` / `PUT` the `{base_url}/{key}.pyz`, the `--serve` server can be used as the endpoint."""
+
+    TIMEOUT = 60
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.base_url!r})"
+
+    def get_url(self, key: str) -> str:
+        return f"{self.base_url}/{self.check_key(key)}{self.SUFFIX}"
+
+    def get(self, key: str, target: Path) -> bool:
+        try:
+            with urlopen(self.get_url(key), timeout=self.TIMEOUT) as resp:
+                self._replace_from(resp, Path(target))
+            return True
+        except HTTPError as error:
+            if error.code == 404:
+                return False
+            raise
+
+    def put(self, key: str, source: Path) -> bool:
+        with open(source, "rb") as f:
+            req = Request(
+                self.get_url(key),
+                data=f,
+                method="PUT",
+                headers={
+                    "Content-Length": str(os.fstat(f.fileno()).st_size),
+                    "Content-Type": "application/zip",
+                },
+            )
+            with urlopen(req, timeout=self.TIMEOUT) as resp:
+                return resp.status in (200, 201)
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""Report the usage of the zipapps cache folders, remove the expired or least recently used ones.
+
+python -m zipapps.caching zipapps_cache
+python -m zipapps.caching zipapps_cache --max-size 2G --max-age 30d --dry-run
+
+The running apps hold a shared lock of the `_zip_time_` file in their cache folder (and touch it as the last use time),
+so the folders in use are never removed. The `_zipapps_lazy_pip/<version>_<platform>` targets are the separate entries.
+
+Only the standard library is used, this file is also copied into the .pyz as `zipapps_caching.py` for the runtime policy.
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+
+LAZY_PIP_DIR_NAME = "_zipapps_lazy_pip"
+WHEELHOUSE_DIR_NAME = "_zipapps_wheelhouse"
+TS_FILE_PREFIX = "_zip_time_"
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+AGE_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_size(value) -> int:
+    "Such as `1024`, `500M`, `2G`, `1.5GB`."
+    value = str(value or "").strip().upper().rstrip("B")
+    if not value:
+        return 0
+    unit = value[-1] if value[-1] in SIZE_UNITS else ""
+    return int(float(value[: len(value) - len(unit)]) * SIZE_UNITS[unit])
+
+
+def parse_age(value) -> float:
+    "Such as `3600` (seconds), `90m`, `12h`, `30d`, `2w`."
+    value = str(value or "").strip().lower()
+    if not value:
+        return 0
+    unit = value[-1] if value[-1] in AGE_UNITS else ""
+    return float(value[: len(value) - len(unit)]) * AGE_UNITS[unit]
+
+
+def human_size(size: int):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+
+
+def human_age(seconds: float):
+    for unit, limit in (("s", 60), ("m", 3600), ("h", 86400)):
+        if seconds < limit:
+            return f"{seconds / AGE_UNITS[unit]:.0f}{unit}"
+    return f"{seconds / AGE_UNITS['d']:.0f}d"
+
+
+def get_ts_path(path: str):
+    "The `_zip_time_` file of the cache folder, the newest one if many."
+    ts_paths = []
+    try:
+        for entry in os.scandir(path):
+            if entry.name.startswith(TS_FILE_PREFIX) and entry.is_file():
+                ts_paths.append(entry.path)
+    except OSError:
+        pass
+    return max(ts_paths) if ts_paths else ""
+
+
+def get_size(path: str, seen: set, skip: str = ""):
+    "The size of the files, the hard linked files are counted once."
+    size = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path != skip:
+                        stack.append(entry.path)
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            key = (stat.st_dev, stat.st_ino)
+            if key not in seen:
+                seen.add(key)
+                size += stat.st_size
+    return size
+
+
+def lock_exclusive(ts_path: str):
+    """Return the fd with the exclusive lock of the `_zip_time_` file, None if the folder is in use.
+
+    The shared lock is not available on win32, the folder in use fails to be renamed instead.
+    """
+    if os.name == "nt" or not ts_path:
+        return -1
+    import fcntl
+
+    try:
+        fd = os.open(ts_path, os.O_RDONLY)
+    except OSError:
+        return -1
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def is_in_use(ts_path: str):
+    fd = lock_exclusive(ts_path)
+    if fd is None:
+        return True
+    if fd >= 0:
+        os.close(fd)
+    return False
+
+
+def scan_cache(root: str):
+    "The entries of the app cache folders and the lazy pip targets in them."
+    entries = []
+    seen: set = set()
+    now = time.time()
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return entries
+    for name in names:
+        path = os.path.join(root, name)
+        if name.startswith(".") or os.path.islink(path) or not os.path.isdir(path):
+            # the staging folders of the running extractions
+            continue
+        ts_path = get_ts_path(path)
+        in_use = is_in_use(ts_path)
+        lazy_dir = os.path.join(path, LAZY_PIP_DIR_NAME)
+        entry = {
+            "name": name,
+            "kind": "app",
+            "path": path,
+            "ts_path": ts_path,
+            # the bundled wheels belong to the app, not a lazy pip target
+            "size": get_size(path, seen, skip=lazy_dir)
+            + get_size(os.path.join(lazy_dir, WHEELHOUSE_DIR_NAME), seen),
+            "last_used": os.path.getmtime(ts_path or path),
+            "in_use": in_use,
+        }
+        entries.append(entry)
+        try:
+            targets = sorted(os.listdir(lazy_dir))
+        except OSError:
+            targets = []
+        for target in targets:
+            target_path = os.path.join(lazy_dir, target)
+            if (
+                target == WHEELHOUSE_DIR_NAME
+                or target.startswith(".")
+                or not os.path.isdir(target_path)
+            ):
+                # the staging folders of the running lazy install
+                continue
+            # the pip_args_md5 file is touched while using
+            mtimes = [os.path.getmtime(target_path)]
+            for item in os.scandir(target_path):
+                if item.is_file():
+                    mtimes.append(item.stat().st_mtime)
+            entries.append(
+                {
+                    "name": f"{name}/{LAZY_PIP_DIR_NAME}/{target}",
+                    "kind": "lazy_pip",
+                    "path": target_path,
+                    "ts_path": ts_path,
+                    "size": get_size(target_path, seen),
+                    "last_used": max(mtimes),
+                    # the old versions of the upgraded target are held by the running processes
+                    "in_use": in_use or is_in_use(target_path),
+                    "app": path,
+                }
+            )
+    for entry in entries:
+        entry["age"] = max(now - entry["last_used"], 0)
+    return entries
+
+
+def remove_entry(entry: dict):
+    "Rename the folder under the exclusive lock then remove it, False if it is in use."
+    fd = lock_exclusive(entry["ts_path"])
+    if fd is None:
+        return False
+    try:
+        path = entry["path"]
+        tombstone = os.path.join(
+            os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.gc"
+        )
+        try:
+            os.replace(path, tombstone)
+        except OSError:
+            return False
+    finally:
+        if fd >= 0:
+            # the apps waiting for the shared lock will find the folder removed
+            os.close(fd)
+    shutil.rmtree(tombstone, ignore_errors=True)
+    return True
+
+
+def collect_garbage(
+    root: str, max_size=0, max_age=0, exclude=(), dry_run=False, entries=None
+):
+    """Remove the entries older than `max_age`, then the least recently used ones until the total size <= `max_size`.
+
+    Return the removed (or to be removed with `dry_run`) entries."""
+    max_size, max_age = parse_size(max_size), parse_age(max_age)
+    if not (max_size or max_age):
+        return []
+    if entries is None:
+        entries = scan_cache(root)
+    excluded = {os.path.abspath(path) for path in exclude}
+    total = sum(entry["size"] for entry in entries)
+    removed = []
+    removed_apps = set()
+    for entry in sorted(entries, key=lambda i: i["last_used"]):
+        if entry.get("app") in removed_apps:
+            continue
+        expired = max_age and entry["age"] > max_age
+        if not (expired or (max_size and total > max_size)):
+            continue
+        if entry["in_use"] or os.path.abspath(entry["path"]) in excluded:
+            continue
+        if not (dry_run or remove_entry(entry)):
+            continue
+        removed.append(entry)
+        total -= entry["size"]
+        if entry["kind"] == "app":
+            removed_apps.add(entry["path"])
+            for child in entries:
+                if child.get("app") == entry["path"]:
+                    total -= child["size"]
+    return removed
+
+
+def format_table(rows: list):
+    "The lines of the table, the first row is the header, the first column is left aligned."
+    widths = [max(len(row[index]) for row in rows) for index in range(len(rows[0]))]
+    lines = [
+        "  ".join(
+            cell.ljust(width) if index == 0 else cell.rjust(width)
+            for index, (cell, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    ]
+    lines.insert(1, "-" * len(lines[0]))
+    lines.append("-" * len(lines[0]))
+    return lines
+
+
+def format_report(entries: list, removed: list = ()):
+    columns = ["name", "kind", "size", "last used", "in use"]
+    removed_paths = {entry["path"] for entry in removed}
+    rows = [columns]
+    for entry in entries:
+        rows.append(
+            [
+                entry["name"] + (" -" if entry["path"] in removed_paths else ""),
+                entry["kind"],
+                human_size(entry["size"]),
+                human_age(entry["age"]) + " ago",
+                "yes" if entry["in_use"] else "no",
+            ]
+        )
+    lines = format_table(rows)
+    total = sum(entry["size"] for entry in entries)
+    freed = sum(entry["size"] for entry in removed)
+    lines.append(
+        f"{len(entries)} entries, {human_size(total)} in total, {len(removed)} removed"
+        f" ({human_size(freed)}). (- removed)"
+    )
+    return "\n".join(lines)
+
+
+def cache_cli(root: str, max_size="", max_age="", dry_run=False, json_path=""):
+    entries = scan_cache(root)
+    removed = collect_garbage(root, max_size, max_age, dry_run=dry_run, entries=entries)
+    report = {
+        "path": os.path.abspath(root),
+        "entries": entries,
+        "removed": [entry["path"] for entry in removed],
+        "dry_run": dry_run,
+    }
+    if json_path == "-":
+        print(json.dumps(report, indent=2))
+        return report
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(format_report(entries, removed))
+    return report
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        usage="python -m zipapps.caching [path] [--max-size 2G] [--max-age 30d] [--dry-run]",
+        description="Report the usage of the zipapps cache folders,"
+        " remove the expired or least recently used ones which are not in use.",
+    )
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default="zipapps_cache",
+        help="The parent folder of the app cache folders, the same as `--unzip-path`, defaults to `zipapps_cache`.",
+    )
+    parser.add_argument(
+        "--max-size",
+        default="",
+        help="Remove the least recently used entries until the total size is under it, such as `500M` / `2G`.",
+    )
+    parser.add_argument(
+        "--max-age",
+        default="",
+        help="Remove the entries not used for the given time, such as `3600` / `12h` / `30d`.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report the entries to be removed.",
+    )
+    parser.add_argument(
+        "--json",
+        default="",
+        dest="json_path",
+        help="Dump the report into JSON. A file path needed and `-` means stdout.",
+    )
+    args = parser.parse_args()
+    if not os.path.isdir(args.path):
+        sys.stderr.write(f"{args.path} is not a folder.\n")
+        return 1
+    cache_cli(
+        args.path,
+        max_size=args.max_size,
+        max_age=args.max_age,
+        dry_run=args.dry_run,
+        json_path=args.json_path,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
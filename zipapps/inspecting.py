@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Report where the bytes of a `.pyz` go, grouped by the top-level packages.
+
+python -m zipapps --inspect app.pyz
+python -m zipapps --inspect app.pyz --measure --inspect-json report.json
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import typing
+from pathlib import Path
+from zipfile import ZipFile
+
+from .caching import format_table, human_size
+from .main import ZipApp
+
+NATIVE_REGEX = re.compile(r"\.(so(\.\d+)*|pyd|dylib|dll)$", re.I)
+MEASURE_CODE = """
+import sys, time
+try:
+    import ensure_zipapps
+except ImportError:
+    pass
+start = time.perf_counter()
+import {name}
+print(time.perf_counter() - start)
+"""
+
+
+def get_top_level_name(filename: str):
+    # the same as the names matching of `unzip` while running
+    return os.path.splitext(filename.split("/")[0])[0]
+
+
+def get_internal_names(output_name: str):
+    return {
+        "__main__",
+        "ensure_zipapps",
+        "ensure_zipapps_fast",
+        "activate_zipapps",
+        "zipapps_caching",
+        "zipapps_config",
+        f"ensure_{output_name}",
+        f"ensure_zipapps_{output_name}",
+        ZipApp.LAZY_PIP_DIR_NAME,
+        get_top_level_name(ZipApp.STORE_MANIFEST_NAME),
+    }
+
+
+def measure_import_time(app_path: Path, name: str, timeout=60):
+    "Cold import time of the package in a new process, excluding the activation."
+    env = dict(os.environ, PYTHONPATH=app_path.absolute().as_posix())
+    try:
+        output = subprocess.check_output(
+            [sys.executable, "-c", MEASURE_CODE.format(name=name)],
+            env=env,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+        return float(output.strip().splitlines()[-1])
+    except (subprocess.SubprocessError, ValueError, IndexError, OSError):
+        return None
+
+
+def inspect_app(path: typing.Union[str, Path], measure=False):
+    app_path = Path(path)
+    with ZipFile(app_path, "r") as zf:
+        infolist = zf.infolist()
+        try:
+            config = json.loads(zf.read("zipapps_config.json").decode("utf-8"))
+        except KeyError:
+            config = {}
+    unzip = config.get("unzip", "")
+    unzip_names = set(unzip.split(",")) if unzip else set()
+    unzip_exclude = config.get("unzip_exclude", "")
+    exclude_names = set(unzip_exclude.split(",")) if unzip_exclude else set()
+    internal_names = get_internal_names(app_path.stem)
+    packages: typing.Dict[str, dict] = {}
+    for member in infolist:
+        if member.is_dir():
+            continue
+        name = get_top_level_name(member.filename)
+        item = packages.get(name)
+        if item is None:
+            item = packages[name] = {
+                "name": name,
+                "files": 0,
+                "file_size": 0,
+                "compressed_size": 0,
+                "native_size": 0,
+                "extract": None,
+                "internal": name in internal_names
+                or name.startswith(("_zip_time_", "_build_id_")),
+                "import_time": None,
+            }
+        item["files"] += 1
+        item["file_size"] += member.file_size
+        item["compressed_size"] += member.compress_size
+        if NATIVE_REGEX.search(member.filename):
+            item["native_size"] += member.file_size
+        if config:
+            allow_unzip = (
+                unzip == "*"
+                or member.filename in unzip_names
+                or name in unzip_names
+                or (
+                    name == ZipApp.LAZY_PIP_DIR_NAME
+                    and bool(config.get("lazy_install"))
+                )
+            )
+            exclude_unzip = member.filename in exclude_names or name in exclude_names
+            item["extract"] = bool(item["extract"]) or (
+                allow_unzip and not exclude_unzip
+            )
+    items = sorted(packages.values(), key=lambda i: i["compressed_size"], reverse=True)
+    for item in items:
+        item["ratio"] = round(
+            item["compressed_size"] / item["file_size"] if item["file_size"] else 1, 4
+        )
+        if measure and not item["internal"] and item["name"].isidentifier():
+            item["import_time"] = measure_import_time(app_path, item["name"])
+    return {
+        "path": app_path.absolute().as_posix(),
+        "size": app_path.stat().st_size,
+        "members": len(infolist),
+        "file_size": sum(i["file_size"] for i in items),
+        "compressed_size": sum(i["compressed_size"] for i in items),
+        "native_size": sum(i["native_size"] for i in items),
+        "config": config,
+        "packages": items,
+    }
+
+
+def format_report(report: dict):
+    columns = ["name", "files", "size", "compressed", "ratio", "native", "extract"]
+    measured = any(i["import_time"] is not None for i in report["packages"])
+    if measured:
+        columns.append("import(ms)")
+    rows = [columns]
+    for item in report["packages"]:
+        row = [
+            item["name"] + (" *" if item["internal"] else ""),
+            str(item["files"]),
+            human_size(item["file_size"]),
+            human_size(item["compressed_size"]),
+            f"{item['ratio']:.0%}",
+            human_size(item["native_size"]) if item["native_size"] else "-",
+            {True: "yes", False: "no", None: "-"}[item["extract"]],
+        ]
+        if measured:
+            import_time = item["import_time"]
+            row.append("-" if import_time is None else f"{import_time * 1000:.1f}")
+        rows.append(row)
+    lines = format_table(rows)
+    lines.append(
+        f"{report['path']}: {human_size(report['size'])}, {report['members']} members,"
+        f" {human_size(report['file_size'])} uncompressed,"
+        f" {human_size(report['native_size'])} native. (* zipapps internal files)"
+    )
+    return "\n".join(lines)
+
+
+def inspect_cli(path: str, measure=False, json_path=""):
+    report = inspect_app(path, measure=measure)
+    if json_path == "-":
+        print(json.dumps(report, indent=2))
+        return report
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(format_report(report))
+    return report
@@ -2,6 +2,7 @@
 
 import compileall
 import json
+import os
 import re
 import shutil
 import sys
@@ -15,7 +16,7 @@ from pathlib import Path
 from pkgutil import get_data
 from zipfile import ZIP_DEFLATED, ZIP_STORED, BadZipFile, ZipFile
 
-__version__ = "2026.4.17"
+__version__ = "2026.10.19"
 
 
 def get_pip_main(ensurepip_root=None):
@@ -56,11 +57,60 @@ class ZipApp(object):
     DEFAULT_OUTPUT_PATH = "app.pyz"
     DEFAULT_UNZIP_CACHE_PATH = "zipapps_cache"
     AUTO_FIX_UNZIP_KEYS = {"AUTO_UNZIP", "AUTO"}
+    LAZY_UNZIP_KEY = "LAZY"
+    MEMFD_UNZIP_KEY = "MEMFD"
     COMPILE_KWARGS: typing.Dict[str, typing.Any] = {}
     HANDLE_OTHER_ENVS_FLAG = "--zipapps"
     LAZY_PIP_DIR_NAME = "_zipapps_lazy_pip"
+    STORE_MANIFEST_NAME = "_zipapps_store.json"
+    WHEELHOUSE_DIR_NAME = "_zipapps_wheelhouse"
     PATH_SPLIT_TAG = ","
     HANDLE_ACTIVATE_ZIPAPPS = "--activate-zipapps"
+    HANDLE_WARMUP_ZIPAPPS = "--zipapps-warmup"
+    # the pip options followed by a value, to find the requirements in pip_args
+    PIP_VALUE_OPTIONS = {
+        "-i",
+        "--index-url",
+        "--extra-index-url",
+        "-f",
+        "--find-links",
+        "-c",
+        "--constraint",
+        "-t",
+        "--target",
+        "--platform",
+        "--python-version",
+        "--implementation",
+        "--abi",
+        "--root",
+        "--prefix",
+        "--src",
+        "--upgrade-strategy",
+        "--progress-bar",
+        "--trusted-host",
+        "--proxy",
+        "--retries",
+        "--timeout",
+        "--exists-action",
+        "--cert",
+        "--client-cert",
+        "--cache-dir",
+        "--log",
+        "--no-binary",
+        "--only-binary",
+        "-C",
+        "--config-settings",
+        "--global-option",
+        "--report",
+        "--python",
+        "--keyring-provider",
+        "--root-user-action",
+        "--use-feature",
+        "--use-deprecated",
+    }
+    PINNED_REQUIREMENT_REGEX = re.compile(
+        r"^[A-Za-z0-9][\w.\-]*(\[[\w.,\s\-]*\])?\s*===?\s*[^\s*,;]+\s*(;.*)?$"
+    )
     ENV_ALIAS = {
         "unzip": "ZIPAPPS_UNZIP",
         "unzip_exclude": "ZIPAPPS_UNZIP_EXCLUDE",
@@ -70,6 +120,14 @@ class ZipApp(object):
         "clear_zipapps_cache": "CLEAR_ZIPAPPS_CACHE",
         "clear_zipapps_self": "CLEAR_ZIPAPPS_SELF",
         "chmod": "UNZIP_CHMOD",
+        "mmap_reader": "ZIPAPPS_MMAP",
+        "bytecode_cache": "ZIPAPPS_BYTECODE_CACHE",
+        "unzip_store": "ZIPAPPS_UNZIP_STORE",
+        "cache_max_size": "ZIPAPPS_CACHE_MAX_SIZE",
+        "cache_max_age": "ZIPAPPS_CACHE_MAX_AGE",
+        "uv_path": "ZIPAPPS_UV_PATH",
+        "upgrade_interval": "ZIPAPPS_UPGRADE_INTERVAL",
+        "upgrade_background": "ZIPAPPS_UPGRADE_BACKGROUND",
     }
 
     LOGGING: bool = True
@@ -103,6 +161,16 @@ class ZipApp(object):
         clear_zipapps_self: bool = False,
         rm_patterns: str = "*.dist-info,__pycache__",
         uv_path: str = "",
+        artifact_store: str = "",
+        compile_versions: str = "",
+        mmap_reader: bool = False,
+        bytecode_cache: bool = False,
+        unzip_store: str = "",
+        cache_max_size: str = "",
+        cache_max_age: str = "",
+        wheelhouse: str = "",
+        upgrade_interval: str = "",
+        upgrade_background: bool = False,
     ):
         """Zip your code.
 
@@ -120,7 +188,7 @@ class ZipApp(object):
         :type compressed: bool, optional
         :param shell: whether run python in subprocess, or use runpy if shell is False, defaults to False
         :type shell: bool, optional
-        :param unzip: names to be unzip, using `AUTO` is a better choice, defaults to ''. Can be overwrite with environment variable `ZIPAPPS_UNZIP`
+        :param unzip: names to be unzip, using `AUTO` is a better choice, or `LAZY` to unzip the .so/.pyd files at the first import, or `MEMFD` to load them from memory(linux), defaults to ''. Can be overwrite with environment variable `ZIPAPPS_UNZIP`
         :type unzip: str, optional
         :param unzip_path: If `unzip` arg is not null, cache files will be unzipped to the given path while running. Defaults to `zipapps_cache`, support some internal variables: `$TEMP` means `tempfile.gettempdir()`, `$HOME` means `Path.home()`, `$SELF` means `.pyz` file path, `$PID` means `os.getpid()`, `$CWD` means `Path.cwd()`, defaults to ''
         :type unzip_path: str, optional
@@ -158,8 +226,28 @@ class ZipApp(object):
         :type clear_zipapps_self: bool, optional
         :param rm_patterns: Delete useless files or folders, splited by "," and defaults to `*.dist-info,__pycache__`. Recursively glob: **/*.pyc
         :type rm_patterns: str
-        :param uv_path: The path of the `uv` executable, defaults to '', which means use `uv` in PATH environment variable.
+        :param uv_path: The path of the `uv` executable, defaults to '', which means use `uv` in PATH environment variable. With `lazy_install`, it is resolved while running (in the cache folder, the path with $SELF, or PATH), falls back to pip.
         :type uv_path: str, optional
+        :param artifact_store: The shared folder or `http(s)://` url to fetch / publish the built files, keyed by the hash of all the build inputs. So the parallel builders will not build the same file again, defaults to ''
+        :type artifact_store: str, optional
+        :param compile_versions: Compile .py to the version-tagged .pyc files for each given python version(or interpreter path), separated by commas, such as `3.9,3.11,/usr/bin/python3.12`. The matching bytecode in the zip will be loaded while running, other versions fall back to the source, defaults to ''
+        :type compile_versions: str, optional
+        :param mmap_reader: Read the modules and data files from the memory-mapped `.pyz` file while running, instead of seeking and reading the file for each member, defaults to False. Can be overwrite with environment variable `ZIPAPPS_MMAP`
+        :type mmap_reader: bool, optional
+        :param bytecode_cache: Save the code objects compiled from the sources in the zip into the cache folder while running (keyed by the archive identity, member name and CRC), so the later processes will not compile them again, defaults to False. Can be overwrite with environment variable `ZIPAPPS_BYTECODE_CACHE`
+        :type bytecode_cache: bool, optional
+        :param unzip_store: The content-addressed store shared by the apps on the host, such as `$HOME/.zipapps_store`. The `unzip` files are extracted into the store by the sha256 of the content, then linked into the cache folder, so the same files of the apps are extracted only once, defaults to ''. Can be overwrite with environment variable `ZIPAPPS_UNZIP_STORE`
+        :type unzip_store: str, optional
+        :param cache_max_size: After extracting, remove the least recently used cache folders of the other apps (and the lazy pip targets) in the same `unzip_path` until the total size is under it, such as `2G`. The folders in use are skipped, defaults to ''. Can be overwrite with environment variable `ZIPAPPS_CACHE_MAX_SIZE`
+        :type cache_max_size: str, optional
+        :param cache_max_age: After extracting, remove the cache folders of the other apps (and the lazy pip targets) not used for the given time, such as `30d`. The folders in use are skipped, defaults to ''. Can be overwrite with environment variable `ZIPAPPS_CACHE_MAX_AGE`
+        :type cache_max_age: str, optional
+        :param wheelhouse: With `lazy_install`, download the wheels of the given targets into the .pyz, such as `native,3.11-manylinux2014_x86_64,3.12-win_amd64` (`[python_version-]platform`, `native` for the current interpreter). While running, the wheels matching the python / platform are unpacked into the lazy pip target without pip and network, falls back to pip if no target matched, defaults to ''
+        :type wheelhouse: str, optional
+        :param upgrade_interval: With `lazy_install` and `-U` / `--upgrade` in `pip_args`, only upgrade the requirements if the last successful upgrade is older than it, such as `12h` / `1d`. Defaults to '', which means upgrading at every start. Can be overwrite with environment variable `ZIPAPPS_UPGRADE_INTERVAL`
+        :type upgrade_interval: str, optional
+        :param upgrade_background: Run the due upgrade in a detached process, the current process goes on with the installed requirements, defaults to False. Can be overwrite with environment variable `ZIPAPPS_UPGRADE_BACKGROUND`
+        :type upgrade_background: bool, optional
         """
         self.includes = includes
         self.cache_path = cache_path
@@ -189,9 +277,21 @@ class ZipApp(object):
         self.chmod = chmod
         self.rm_patterns = rm_patterns
         self.uv_path = uv_path
+        self.artifact_store = artifact_store
+        self.compile_versions = compile_versions
+        self.mmap_reader = mmap_reader
+        self.bytecode_cache = bytecode_cache
+        self.unzip_store = unzip_store
+        self.cache_max_size = cache_max_size
+        self.cache_max_age = cache_max_age
+        self.wheelhouse = wheelhouse
+        self.upgrade_interval = upgrade_interval
+        self.upgrade_background = upgrade_background
 
         self._tmp_dir: typing.Optional[tempfile.TemporaryDirectory] = None
         self._build_success = False
+        self._artifact_fetched = False
+        self._artifact_key = ""
         self._is_greater_than_python_37 = (
             sys.version_info.minor >= 7 and sys.version_info.major >= 3
         )
@@ -225,6 +325,16 @@ class ZipApp(object):
             chmod=self.chmod,
             clear_zipapps_self=self.clear_zipapps_self,
             uv_path=self.uv_path,
+            artifact_store=self.artifact_store,
+            compile_versions=self.compile_versions,
+            mmap_reader=self.mmap_reader,
+            bytecode_cache=self.bytecode_cache,
+            unzip_store=self.unzip_store,
+            cache_max_size=self.cache_max_size,
+            cache_max_age=self.cache_max_age,
+            wheelhouse=self.wheelhouse,
+            upgrade_interval=self.upgrade_interval,
+            upgrade_background=self.upgrade_background,
         )
 
     def ensure_args(self):
@@ -233,10 +343,6 @@ class ZipApp(object):
                 self._log(
                     "[WARN]: The arg `unzip_exclude` should not be with `unzip` but `unzip` is null."
                 )
-            if self.compiled:
-                self._log(
-                    "[WARN]: The arg `compiled` should not be True while `unzip` is null, because .pyc files of __pycache__ folder may not work in zip file."
-                )
             if self.lazy_install:
                 self._log(
                     '[WARN]: the `unzip` arg has been changed to "*" while `lazy_install` is True.'
@@ -280,9 +386,23 @@ class ZipApp(object):
         self.ensure_args()
         if self.build_exists():
             return self._output_path
+        if self.fetch_artifact():
+            self._build_success = True
+            return self._output_path
+        self.prepare_cache_path()
+        self.make_archive()
+        self.publish_artifact()
+        self._build_success = True
+        return self._output_path
+
+    def prepare_cache_path(self):
+        "Copy the includes and install the requirements into the cache_path."
         self.prepare_includes()
         self.prepare_ensure_pip()
         self.prepare_pip()
+
+    def make_archive(self):
+        "Create the output file from the prepared cache_path."
         if not self.layer_mode:
             self.prepare_entry_point()
         if self.build_id_name:
@@ -290,14 +410,346 @@ class ZipApp(object):
             (self._cache_path / self.build_id_name).touch()
         if self.compiled:
             compileall.compile_dir(self._cache_path, **ZipApp.COMPILE_KWARGS)
+        if self.compile_versions:
+            self.compile_with_versions()
         self.clean_pip_pycache()
         if self.layer_mode:
             self.create_archive_layer()
         else:
+            self.prepare_store_manifest()
             self.create_archive()
+
+    @staticmethod
+    def find_interpreter(version: str) -> typing.List[str]:
+        "Find the python interpreter by version string like `3.11`, or the path of the interpreter."
+        if Path(version).is_file():
+            return [Path(version).absolute().as_posix()]
+        path = shutil.which(f"python{version}")
+        if path:
+            return [path]
+        if sys.platform == "win32" and shutil.which("py"):
+            return [shutil.which("py"), f"-{version}"]
+        return []
+
+    def compile_with_versions(self):
+        "Compile the cache_path into `__pycache__/*.{cache_tag}.pyc` with each interpreter of compile_versions."
+        import subprocess
+
+        for version in self.compile_versions.split(","):
+            version = version.strip()
+            if not version:
+                continue
+            interpreter = self.find_interpreter(version)
+            if not interpreter:
+                self._log(f"[WARN]: python{version} not found, skip compiling for it.")
+                continue
+            args = interpreter + ["-m", "compileall", "-q", self._cache_path.as_posix()]
+            self._log(f"[INFO]: compiling with {args}")
+            if subprocess.call(args, stdout=subprocess.DEVNULL) != 0:
+                self._log(
+                    f"[WARN]: compile with python{version} failed, some modules will fall back to the source."
+                )
+
+    def get_watch_snapshot(self, paths: typing.List[str]):
+        "The (mtime_ns, size, source path) of all the files, keyed by the relative path to the parent of each given path."
+        snapshot: typing.Dict[str, tuple] = {}
+        for _path in paths:
+            path = Path(_path)
+            if path.is_file():
+                stat = path.stat()
+                snapshot[path.name] = (stat.st_mtime_ns, stat.st_size, path.as_posix())
+                continue
+            for root, _, files in os.walk(path):
+                for name in files:
+                    file_path = Path(root) / name
+                    try:
+                        stat = file_path.stat()
+                    except FileNotFoundError:
+                        continue
+                    key = file_path.relative_to(path.parent).as_posix()
+                    snapshot[key] = (
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                        file_path.as_posix(),
+                    )
+        return snapshot
+
+    def sync_includes(self, old: dict, new: dict):
+        "Copy the added / changed include files into the cache_path and remove the deleted ones."
+        if self.layer_mode:
+            _target_dir = self._cache_path.absolute() / self.layer_mode_prefix
+        else:
+            _target_dir = self._cache_path.absolute()
+        changed = 0
+        for key in old.keys() - new.keys():
+            target = _target_dir / key
+            try:
+                target.unlink()
+                changed += 1
+            except FileNotFoundError:
+                continue
+            # remove the empty folders
+            for parent in target.parents:
+                if parent == _target_dir:
+                    break
+                try:
+                    parent.rmdir()
+                except OSError:
+                    break
+        for key, value in new.items():
+            if old.get(key) != value:
+                target = _target_dir / key
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(value[2], target)
+                changed += 1
+        return changed
+
+    def watch(self, interval: float = 0.5):
+        """Build the output file, then rebuild it while the `includes` changed.
+
+        The cache_path is kept, so the includes changes only copy the changed files and create the archive again,
+        pip runs again only while the requirement files changed.
+        The custom cache_path is not cleared for the requirements changes, so the requirement files are not watched with it.
+        """
+        self._log(
+            f"[INFO]: {'=' * 10} Start watching `{self._output_path}` with zipapps version <{__version__}> {'=' * 10}"
+        )
+        self.ensure_args()
+        raw_unzip = self.unzip
+        raw_pip_args = list(self.pip_args or [])
+        include_paths = (
+            self.includes.split(self.PATH_SPLIT_TAG) if self.includes else []
+        )
+        requirement_paths = [arg for arg in raw_pip_args if Path(arg).is_file()]
+        if requirement_paths and self._tmp_dir is None:
+            raise RuntimeError(
+                "the custom cache_path will not be cleared for the requirement files changes,"
+                " remove the `cache_path` arg to watch the requirement files."
+            )
+        includes_snapshot = self.get_watch_snapshot(include_paths)
+        requirements_snapshot = self.get_watch_snapshot(requirement_paths)
+        self.prepare_cache_path()
+        self.make_archive()
         self._build_success = True
+        self._log(
+            f"[INFO]: watching {include_paths + requirement_paths} every {interval}s"
+        )
+        try:
+            while True:
+                time.sleep(interval)
+                start = time.time()
+                new_requirements_snapshot = self.get_watch_snapshot(requirement_paths)
+                new_includes_snapshot = self.get_watch_snapshot(include_paths)
+                if new_requirements_snapshot != requirements_snapshot:
+                    self._log(
+                        "[INFO]: requirement files changed, prepare the cache_path again"
+                    )
+                    for path in self._cache_path.iterdir():
+                        if path.is_dir():
+                            shutil.rmtree(path, ignore_errors=True)
+                        else:
+                            path.unlink()
+                    self.pip_args = list(raw_pip_args)
+                    self.prepare_cache_path()
+                    changed = len(new_includes_snapshot)
+                elif new_includes_snapshot != includes_snapshot:
+                    changed = self.sync_includes(
+                        includes_snapshot, new_includes_snapshot
+                    )
+                else:
+                    continue
+                requirements_snapshot = new_requirements_snapshot
+                includes_snapshot = new_includes_snapshot
+                # new _zip_time_ file to refresh the unzipped cache while running
+                for path in self._cache_path.glob("_zip_time_*"):
+                    path.unlink()
+                self.unzip = raw_unzip
+                self.make_archive()
+                self._log(
+                    f"[INFO]: rebuilt `{self._output_path}` for {changed} changed files in {round(time.time() - start, 3)}s"
+                )
+        except KeyboardInterrupt:
+            self._log("[INFO]: stop watching.")
         return self._output_path
 
+    def prepare_store_manifest(self):
+        "Save the sha256 of the files, which are the keys of the `unzip_store` while running."
+        from hashlib import sha256
+
+        manifest_path = self._cache_path / self.STORE_MANIFEST_NAME
+        if manifest_path.is_file():
+            # the cache_path may be reused
+            manifest_path.unlink()
+        if not (self.unzip_store and self.unzip):
+            return
+        hashes = {}
+        for path in sorted(self._cache_path.glob("**/*")):
+            if not path.is_file():
+                continue
+            _hash = sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    _hash.update(chunk)
+            hashes[path.relative_to(self._cache_path).as_posix()] = _hash.hexdigest()
+        manifest_path.write_text(json.dumps(hashes), encoding="utf-8")
+
+    def get_build_input_hash(self):
+        "The md5 of all the build inputs: kwargs, zipapps/python version, platform and the content of input files."
+        import platform
+
+        kwargs = self.kwargs
+        for key in ("output", "cache_path", "artifact_store"):
+            kwargs.pop(key, None)
+        kwargs["pip_args"] = kwargs["pip_args"] or []
+        kwargs["rm_patterns"] = self.rm_patterns
+        _md5 = md5(
+            json.dumps(
+                [
+                    kwargs,
+                    Path(self.output).name,
+                    __version__,
+                    sys.version_info[:2],
+                    sys.platform,
+                    platform.machine(),
+                ],
+                sort_keys=True,
+                default=str,
+            ).encode("utf-8")
+        )
+        paths = self.includes.split(self.PATH_SPLIT_TAG) if self.includes else []
+        paths += [arg for arg in self.pip_args or [] if Path(arg).is_file()]
+        # the nested `-r` files
+        for path in self.parse_requirements()[1]:
+            if path.as_posix() not in paths:
+                paths.append(path.as_posix())
+        for _path in paths:
+            path = Path(_path)
+            if path.is_dir():
+                files = sorted(p for p in path.glob("**/*") if p.is_file())
+            else:
+                files = [path]
+            for file_path in files:
+                _md5.update(
+                    file_path.relative_to(path.parent).as_posix().encode("utf-8")
+                )
+                _md5.update(b"\0")
+                _md5.update(file_path.read_bytes())
+        return _md5.hexdigest()
+
+    @classmethod
+    def read_requirement_file(cls, path: Path, files: typing.List[Path]):
+        "The requirement lines of the file and the nested `-r` files, the file paths are appended to files."
+        files.append(path)
+        requirements = []
+        text = re.sub(r"\\\r?\n", " ", path.read_text(encoding="utf-8"))
+        for line in text.splitlines():
+            line = re.sub(r"(^|\s)#.*$", "", line).strip()
+            if not line:
+                continue
+            match = re.match(r"^(-r|--requirement)[\s=]*(\S+)$", line)
+            if match:
+                nested = path.parent / match.group(2)
+                if nested not in files and nested.is_file():
+                    requirements.extend(cls.read_requirement_file(nested, files))
+            elif line.startswith(("-e", "--editable")) or not line.startswith("-"):
+                requirements.append(line)
+        return requirements
+
+    def parse_requirements(self):
+        "The requirements of pip_args (and the requirement files), and the paths of the requirement files."
+        requirements: typing.List[str] = []
+        files: typing.List[Path] = []
+        args = list(self.pip_args or [])
+        index = 0
+        while index < len(args):
+            arg = args[index]
+            index += 1
+            value = None
+            if arg in ("-r", "--requirement", "-e", "--editable"):
+                if index < len(args):
+                    value = args[index]
+                    index += 1
+            elif arg.startswith("--requirement=") or arg.startswith("--editable="):
+                arg, _, value = arg.partition("=")
+            elif arg[:2] in ("-r", "-e") and len(arg) > 2:
+                arg, value = arg[:2], arg[2:]
+            elif arg in self.PIP_VALUE_OPTIONS:
+                index += 1
+                continue
+            elif not arg.startswith("-"):
+                requirements.append(arg)
+                continue
+            if value is None:
+                continue
+            if arg in ("-e", "--editable"):
+                requirements.append(f"-e {value}")
+            elif Path(value).is_file():
+                requirements.extend(self.read_requirement_file(Path(value), files))
+        return requirements, files
+
+    def is_pinned_requirement(self, requirement: str):
+        "The exact version `name==1.0`, the local file, or the direct url except VCS."
+        requirement = re.sub(r"\s--hash[=\s]\S+", "", requirement).strip()
+        if Path(requirement).is_file():
+            # the content is in the hash
+            return True
+        _, at, url = requirement.partition("@")
+        if at and "://" in url:
+            return not url.strip().startswith(("git+", "hg+", "svn+", "bzr+"))
+        return bool(self.PINNED_REQUIREMENT_REGEX.match(requirement))
+
+    def get_unpinned_requirements(self):
+        "The built file of the same inputs changes while the new versions of the unpinned requirements are released."
+        if self.lazy_install and not self.wheelhouse:
+            # installed while running, not in the built file
+            return []
+        return [
+            requirement
+            for requirement in self.parse_requirements()[0]
+            if not self.is_pinned_requirement(requirement)
+        ]
+
+    def _get_artifact_store(self):
+        from .artifacts import ArtifactStore
+
+        return ArtifactStore.from_uri(self.artifact_store)
+
+    def fetch_artifact(self):
+        if not self.artifact_store:
+            return False
+        unpinned = self.get_unpinned_requirements()
+        if unpinned:
+            self._log(
+                f"[WARN]: skip the artifact store, the versions of the requirements are not pinned: {unpinned}"
+            )
+            return False
+        self._artifact_key = self.get_build_input_hash()
+        store = self._get_artifact_store()
+        try:
+            if store.get(self._artifact_key, self._output_path):
+                self._log(
+                    f"[INFO]: fetched `{self._output_path}` from the artifact store {store!r}, key={self._artifact_key}"
+                )
+                self._artifact_fetched = True
+                return True
+        except OSError as error:
+            self._log(f"[WARN]: fetch artifact from {store!r} failed: {error!r}")
+        return False
+
+    def publish_artifact(self):
+        if not (self.artifact_store and self._artifact_key):
+            return False
+        store = self._get_artifact_store()
+        try:
+            if store.put(self._artifact_key, self._output_path):
+                self._log(
+                    f"[INFO]: published `{self._output_path}` to the artifact store {store!r}, key={self._artifact_key}"
+                )
+                return True
+        except OSError as error:
+            self._log(f"[WARN]: publish artifact to {store!r} failed: {error!r}")
+        return False
+
     def create_archive_layer(self):
         if self.compressed:
             compression = ZIP_STORED
@@ -350,7 +802,12 @@ class ZipApp(object):
         # remove the special keys from unzip_names
         auto_unzip_keys = ZipApp.AUTO_FIX_UNZIP_KEYS & unzip_names
         unzip_names -= auto_unzip_keys
-        if warning_names:
+        if warning_names and unzip_names & {self.LAZY_UNZIP_KEY, self.MEMFD_UNZIP_KEY}:
+            # the extensions will be extracted (or loaded from memory) while importing
+            self._log(
+                f"[INFO]: these .pyd/.so files will be loaded at the first import: {warning_names}"
+            )
+        elif warning_names:
             if self.clear_zipapps_cache:
                 msg = f"[WARN]: clear_zipapps_cache is True but .pyd/.so files were found {warning_names}"
                 self._log(msg)
@@ -418,8 +875,21 @@ class ZipApp(object):
             "pip_args_md5": self.pip_args_md5,
             "clear_zipapps_cache": repr(self.clear_zipapps_cache),
             "HANDLE_ACTIVATE_ZIPAPPS": self.HANDLE_ACTIVATE_ZIPAPPS,
+            "HANDLE_WARMUP_ZIPAPPS": self.HANDLE_WARMUP_ZIPAPPS,
             "chmod": repr(self.chmod),
             "clear_zipapps_self": repr(self.clear_zipapps_self),
+            "zip_bytecode": repr(bool(self.compiled or self.compile_versions)),
+            "mmap_reader": repr(self.mmap_reader),
+            "bytecode_cache": repr(self.bytecode_cache),
+            "unzip_store": repr(self.unzip_store),
+            "cache_max_size": repr(self.cache_max_size),
+            "cache_max_age": repr(self.cache_max_age),
+            "uv_path": repr(self.uv_path if self.lazy_install else ""),
+            "upgrade_interval": repr(self.upgrade_interval),
+            "upgrade_background": repr(self.upgrade_background),
+            "STORE_MANIFEST_NAME": repr(self.STORE_MANIFEST_NAME),
+            "DEFAULT_UNZIP_CACHE_PATH": repr(self.DEFAULT_UNZIP_CACHE_PATH),
+            "WHEELHOUSE_DIR_NAME": repr(self.WHEELHOUSE_DIR_NAME),
         }
         for k, v in self.ENV_ALIAS.items():
             kwargs[f"{k}_env"] = repr(v)
@@ -433,6 +903,21 @@ class ZipApp(object):
             code.format(**kwargs), encoding="utf-8"
         )
 
+        fast_path = self._cache_path / "ensure_zipapps_fast.py"
+        if self.is_warm_start_available():
+            kwargs["runtime_envs"] = repr(
+                sorted(set(self.ENV_ALIAS.values()) | {"UNZIP_PATH"})
+            )
+            code = get_data(__name__, "ensure_zipapps_fast.py.template").decode("utf-8")
+            fast_path.write_text(code.format(**kwargs), encoding="utf-8")
+        elif fast_path.is_file():
+            # the cache_path may be reused
+            fast_path.unlink()
+
+        # the runtime cache policy
+        code = get_data(__name__, "caching.py").decode("utf-8")
+        (self._cache_path / "zipapps_caching.py").write_text(code, encoding="utf-8")
+
         code = get_data(__name__, "activate_zipapps.py").decode("utf-8")
         (self._cache_path / "activate_zipapps.py").write_text(code, encoding="utf-8")
         code += "\n\nactivate()"
@@ -444,8 +929,28 @@ class ZipApp(object):
         (self._cache_path / f"ensure_zipapps_{output_name}.py").write_text(
             code, encoding="utf-8"
         )
+        kwargs = self.kwargs
+        # the credentials in the url should not be shipped
+        kwargs.pop("artifact_store", None)
         (self._cache_path / "zipapps_config.json").write_text(
-            json.dumps(self.kwargs), encoding="utf-8"
+            json.dumps(kwargs), encoding="utf-8"
+        )
+
+    def is_warm_start_available(self):
+        "The warm start only checks the `_zip_time_` file and sets `sys.path`, so the args need more work at startup are excluded."
+        unzip_names = (
+            set(self.unzip.split(self.PATH_SPLIT_TAG)) if self.unzip else set()
+        )
+        if unzip_names & {self.LAZY_UNZIP_KEY, self.MEMFD_UNZIP_KEY}:
+            return False
+        return not (
+            self.lazy_install
+            or self.clear_zipapps_cache
+            or self.clear_zipapps_self
+            or self.compiled
+            or self.compile_versions
+            or self.mmap_reader
+            or self.bytecode_cache
         )
 
     def setup_timestamp_file(
@@ -463,6 +968,10 @@ class ZipApp(object):
 
     def prepare_pip(self):
         self.pip_args_md5 = ""
+        if self.wheelhouse and not (self.lazy_install and self.pip_args):
+            raise RuntimeError(
+                "The arg `wheelhouse` only works with `lazy_install` and `pip_args`."
+            )
         if self.pip_args:
             if "-t" in self.pip_args or "--target" in self.pip_args:
                 raise RuntimeError(
@@ -470,8 +979,8 @@ class ZipApp(object):
                 )
             if self.lazy_install:
                 if self.uv_path:
-                    raise RuntimeError(
-                        "The arg `uv_path` is not supported in lazy_install mode."
+                    self._log(
+                        f"[INFO]: the uv `{self.uv_path}` will be used for the lazy install while running, falls back to pip if not found."
                     )
                 # copy files to cache folder
                 _temp_pip_path = self._cache_path / self.LAZY_PIP_DIR_NAME
@@ -490,9 +999,71 @@ class ZipApp(object):
                 self._log(
                     f"[INFO]: pip_args_md5 has been generated: {self.pip_args_md5}"
                 )
+                if self.wheelhouse:
+                    self.prepare_wheelhouse()
             else:
                 self.pip_install()
 
+    @staticmethod
+    def get_platform_tag():
+        import sysconfig
+
+        return sysconfig.get_platform().replace("-", "_").replace(".", "_")
+
+    def prepare_wheelhouse(self):
+        """Download the wheels of each target into `_zipapps_lazy_pip/_zipapps_wheelhouse`, the same files are saved once.
+
+        The `index.json` saves the wheel names of each target, for the runtime to pick without pip.
+        """
+        wheelhouse = (
+            self._cache_path / self.LAZY_PIP_DIR_NAME / self.WHEELHOUSE_DIR_NAME
+        )
+        wheelhouse.mkdir(parents=True, exist_ok=True)
+        # the copied requirement files are relative to the cache path
+        prefix = f"{self.LAZY_PIP_DIR_NAME}/"
+        pip_args = [
+            (
+                (self._cache_path / arg).absolute().as_posix()
+                if arg.startswith(prefix)
+                else arg
+            )
+            for arg in self.pip_args
+        ]
+        pip_main = get_pip_main()
+        targets = []
+        for item in self.wheelhouse.split(self.PATH_SPLIT_TAG):
+            item = item.strip()
+            if not item:
+                continue
+            args = ["download", "--only-binary=:all:"]
+            if item == "native":
+                python_version = "%s.%s" % sys.version_info[:2]
+                platform_tag = self.get_platform_tag()
+            else:
+                python_version, _, platform_tag = item.rpartition("-")
+                python_version = python_version or "%s.%s" % sys.version_info[:2]
+                args += ["--platform", platform_tag, "--python-version", python_version]
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                self._log(f"[INFO]: download wheels for `{item}`")
+                result = pip_main(args + ["-d", tmp_dir] + pip_args)
+                if result != 0:
+                    raise RuntimeError(
+                        f"pip download failed for `{item}`: return code={result}"
+                    )
+                names = sorted(os.listdir(tmp_dir))
+                for name in names:
+                    if not (wheelhouse / name).is_file():
+                        shutil.move(os.path.join(tmp_dir, name), wheelhouse / name)
+            targets.append(
+                {
+                    "implementation": sys.implementation.name,
+                    "python": python_version,
+                    "platform": platform_tag,
+                    "wheels": names,
+                }
+            )
+        (wheelhouse / "index.json").write_text(json.dumps(targets, indent=2))
+
     @classmethod
     def _rm_with_patterns(
         cls,
@@ -520,7 +1091,6 @@ class ZipApp(object):
             target_dir.absolute().as_posix(),
         ] + pip_args
         if uv_path:
-            import os
             import subprocess
 
             # use uv and subprocess
@@ -653,6 +1223,17 @@ class ZipApp(object):
         chmod: str = "",
         clear_zipapps_self: bool = False,
         rm_patterns: str = "*.dist-info,__pycache__",
+        uv_path: str = "",
+        artifact_store: str = "",
+        compile_versions: str = "",
+        mmap_reader: bool = False,
+        bytecode_cache: bool = False,
+        unzip_store: str = "",
+        cache_max_size: str = "",
+        cache_max_age: str = "",
+        wheelhouse: str = "",
+        upgrade_interval: str = "",
+        upgrade_background: bool = False,
     ):
         app = cls(
             includes=includes,
@@ -681,6 +1262,17 @@ class ZipApp(object):
             chmod=chmod,
             clear_zipapps_self=clear_zipapps_self,
             rm_patterns=rm_patterns,
+            uv_path=uv_path,
+            artifact_store=artifact_store,
+            compile_versions=compile_versions,
+            mmap_reader=mmap_reader,
+            bytecode_cache=bytecode_cache,
+            unzip_store=unzip_store,
+            cache_max_size=cache_max_size,
+            cache_max_age=cache_max_age,
+            wheelhouse=wheelhouse,
+            upgrade_interval=upgrade_interval,
+            upgrade_background=upgrade_background,
         )
         return app.build()
 
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+"""Long-running local build service, POST the `ZipApp` kwargs as JSON and get the `.pyz` back.
+
+python -m zipapps --serve 127.0.0.1:8000
+python -m zipapps --serve unix:/tmp/zipapps.sock
+curl -X POST -d '{"includes": "main.py", "main": "main:main"}' http://127.0.0.1:8000/build -o app.pyz
+
+The clients can read the files under the working folder of the server and run the setup of pip packages,
+so only the loopback addresses and unix sockets are allowed by default.
+"""
+
+import hashlib
+import inspect
+import ipaddress
+import json
+import os
+import re
+import shutil
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import typing
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+from .artifacts import DirectoryArtifactStore
+from .caching import parse_age
+from .main import ZipApp, get_pip_main
+
+# decided by the server
+SERVER_KWARGS = {"cache_path", "artifact_store"}
+# the pip options reading / writing the local files
+PIP_PATH_OPTIONS = {
+    "-r",
+    "--requirement",
+    "-c",
+    "--constraint",
+    "-e",
+    "--editable",
+    "-f",
+    "--find-links",
+    "-t",
+    "--target",
+    "--prefix",
+    "--root",
+    "--src",
+    "--log",
+    "--cache-dir",
+    "--report",
+}
+VERSION_REGEX = re.compile(r"^\d+(\.\d+)*$")
+
+
+def _init_worker():
+    # keep pip imported in the worker process, the later builds will reuse it
+    ZipApp.LOGGING = False
+    try:
+        get_pip_main()
+    except Exception:
+        pass
+
+
+def _build_worker(kwargs: dict, output: str, artifact_store: str):
+    output_path = Path(output)
+    app = ZipApp(**dict(kwargs, output=output_path.as_posix()))
+    app.build_id_name = app.get_build_id_name()
+    if app.build_exists():
+        os.utime(output_path)
+        return {"path": output_path.as_posix(), "cached": True}
+    # build in a private folder, then publish it atomically,
+    # so the responses still streaming the old file will not be broken
+    tmp_dir = tempfile.mkdtemp(prefix="zipapps_", dir=output_path.parent)
+    try:
+        tmp_output = Path(tmp_dir) / output_path.name
+        # the finished builds of the same inputs are fetched from the artifacts
+        app = ZipApp(
+            **dict(kwargs, output=tmp_output.as_posix(), artifact_store=artifact_store)
+        )
+        app.build()
+        os.replace(tmp_output, output_path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return {"path": output_path.as_posix(), "cached": app._artifact_fetched}
+
+
+class BuildServer(object):
+    """Build `.pyz` files with a bounded worker pool.
+
+    Identical requests in-flight share the same build, the finished builds of the same inputs are
+    fetched from the artifacts, the workers are reused to keep pip warm.
+    The built files and artifacts not used for `max_age` are removed.
+    """
+
+    BUILD_PATH = "/build"
+    STATUS_PATH = "/status"
+    ARTIFACTS_PATH = "/artifacts/"
+    ARTIFACTS_DIR_NAME = "artifacts"
+    CHUNK_SIZE = 1024 * 1024
+    CLEAN_INTERVAL = 60
+
+    def __init__(
+        self,
+        address: str = "127.0.0.1:8000",
+        work_dir: typing.Optional[str] = None,
+        max_workers: typing.Optional[int] = None,
+        max_age: typing.Union[str, float] = "7d",
+        allow_remote: bool = False,
+    ):
+        self.address = address
+        self.allow_remote = allow_remote
+        self.check_address(address, allow_remote)
+        self.work_dir = Path(work_dir or Path(tempfile.gettempdir()) / "zipapps_serve")
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        # GET / PUT /artifacts/{key}.pyz, works as the `artifact_store` for the builders
+        self.artifacts = DirectoryArtifactStore(self.work_dir / self.ARTIFACTS_DIR_NAME)
+        self.max_age = parse_age(max_age)
+        self._last_clean = 0.0
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_init_worker
+        )
+        # start the workers before the server threads, forking with threads may deadlock
+        self.executor.submit(int).result()
+        self._pending: typing.Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.httpd = self._create_httpd()
+
+    @staticmethod
+    def get_request_key(kwargs: dict):
+        return hashlib.md5(
+            json.dumps(kwargs, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def check_address(address: str, allow_remote=False):
+        "The clients can read the server files, refuse the non-loopback addresses unless `allow_remote`."
+        if allow_remote or address.startswith("unix:"):
+            return
+        host = address.rpartition(":")[0].strip("[]")
+        if host == "localhost":
+            return
+        try:
+            if ipaddress.ip_address(host).is_loopback:
+                return
+        except ValueError:
+            pass
+        raise ValueError(
+            f"refuse to serve on the non-loopback address {address!r}, the clients are able to read the server files."
+            " Use `--serve-allow-remote` if it is trusted."
+        )
+
+    @staticmethod
+    def is_local_path(arg: str):
+        return (
+            "file:" in arg.lower()
+            or arg.startswith(("/", "\\", ".", "~"))
+            or os.path.isabs(arg)
+            or os.path.exists(arg)
+        )
+
+    @staticmethod
+    def is_relative_path(path: str):
+        "The relative path (or glob pattern) not going out of the working folder."
+        return not (
+            path.startswith(("/", "\\", "~"))
+            or os.path.isabs(path)
+            # the drive of Windows, such as `C:foo`
+            or re.match(r"^[a-zA-Z]:", path)
+            or ".." in re.split(r"[\\/]", path)
+        )
+
+    @classmethod
+    def check_kwargs(cls, kwargs):
+        if not isinstance(kwargs, dict):
+            raise ValueError("the request body should be a JSON object")
+        valid_keys = set(inspect.signature(ZipApp.__init__).parameters) - {"self"}
+        unknown_keys = set(kwargs) - valid_keys
+        if unknown_keys:
+            raise ValueError(f"unknown ZipApp kwargs: {sorted(unknown_keys)}")
+        server_keys = SERVER_KWARGS & set(kwargs)
+        if server_keys:
+            raise ValueError(f"not allowed ZipApp kwargs: {sorted(server_keys)}")
+        # the paths under the working folder / cache_path of the build
+        paths = {
+            "includes": (kwargs.get("includes") or "").split(ZipApp.PATH_SPLIT_TAG),
+            "rm_patterns": (kwargs.get("rm_patterns") or "").split(","),
+            "layer_mode_prefix": [kwargs.get("layer_mode_prefix") or ""],
+        }
+        for name, values in paths.items():
+            for path in values:
+                if not isinstance(path, str) or not cls.is_relative_path(path.strip()):
+                    raise ValueError(
+                        f"only the relative paths in the working folder are allowed for {name}: {path!r}"
+                    )
+        if kwargs.get("uv_path") not in (None, "", "uv"):
+            raise ValueError("only `uv` in PATH is allowed for uv_path")
+        for version in (kwargs.get("compile_versions") or "").split(","):
+            if version.strip() and not VERSION_REGEX.match(version.strip()):
+                raise ValueError(f"invalid compile version: {version!r}")
+        pip_args = kwargs.get("pip_args") or []
+        if not isinstance(pip_args, list):
+            raise ValueError("pip_args should be a list")
+        for arg in pip_args:
+            arg = str(arg)
+            name = arg.split("=", 1)[0]
+            if (
+                name in PIP_PATH_OPTIONS
+                # -rrequirements.txt
+                or (arg[:2] in PIP_PATH_OPTIONS and len(arg) > 2)
+                or (not arg.startswith("-") and cls.is_local_path(arg))
+            ):
+                raise ValueError(
+                    f"the pip args of local files are not allowed: {arg!r}"
+                )
+
+    def submit(self, kwargs: dict) -> Future:
+        "Submit a build, the identical in-flight requests will be coalesced."
+        self.check_kwargs(kwargs)
+        self.collect_garbage()
+        key = self.get_request_key(kwargs)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                output_name = Path(kwargs.get("output") or ZipApp.DEFAULT_OUTPUT_PATH)
+                output_dir = self.work_dir / key
+                output_dir.mkdir(parents=True, exist_ok=True)
+                future = self.executor.submit(
+                    _build_worker,
+                    kwargs,
+                    (output_dir / output_name.name).as_posix(),
+                    self.artifacts.root.absolute().as_posix(),
+                )
+                self._pending[key] = future
+            else:
+                return future
+        # outside the lock, the callback runs at once if the future is already done
+        future.add_done_callback(lambda f: self._pop_pending(key, f))
+        return future
+
+    def _pop_pending(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                self._pending.pop(key, None)
+
+    def collect_garbage(self, force=False):
+        "Remove the built files and artifacts not used for `max_age`, at most once per `CLEAN_INTERVAL` seconds."
+        now = time.time()
+        if not self.max_age or (
+            not force and now - self._last_clean < self.CLEAN_INTERVAL
+        ):
+            return []
+        self._last_clean = now
+        removed = []
+        for path in self.work_dir.iterdir():
+            if path.name == self.ARTIFACTS_DIR_NAME or not path.is_dir():
+                continue
+            with self._lock:
+                if path.name in self._pending:
+                    continue
+                try:
+                    last_used = max(
+                        [path.stat().st_mtime]
+                        + [p.stat().st_mtime for p in path.iterdir()]
+                    )
+                except OSError:
+                    continue
+                if now - last_used > self.max_age:
+                    # the opened files are still readable after removed on posix
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed.append(path)
+        for path in self.artifacts.root.glob(f"*/*{self.artifacts.SUFFIX}"):
+            try:
+                if now - path.stat().st_mtime > self.max_age:
+                    path.unlink()
+                    removed.append(path)
+            except OSError:
+                continue
+        return removed
+
+    def status(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "address": self.address,
+            "work_dir": self.work_dir.as_posix(),
+            "max_workers": self.max_workers,
+            "max_age": self.max_age,
+            "pending": pending,
+        }
+
+    def _create_httpd(self):
+        handler = type("Handler", (_BuildRequestHandler,), {"server_app": self})
+        if self.address.startswith("unix:"):
+            if not hasattr(socket, "AF_UNIX"):
+                raise RuntimeError("unix socket is not supported on this platform")
+            path = self.address[len("unix:") :]
+            if os.path.exists(path):
+                os.unlink(path)
+            return _UnixHTTPServer(path, handler)
+        host, _, port = self.address.rpartition(":")
+        return _ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+
+    @property
+    def server_address(self):
+        return self.httpd.server_address
+
+    def serve_forever(self):
+        ZipApp._log(f"[INFO]: zipapps build server is listening on {self.address}")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+
+    def close(self):
+        self.httpd.server_close()
+        self.executor.shutdown(wait=False)
+        if self.address.startswith("unix:"):
+            try:
+                os.unlink(self.address[len("unix:") :])
+            except OSError:
+                pass
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+class _BodyReader(object):
+    def __init__(self, rfile, length: int):
+        self.rfile = rfile
+        self.length = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.length:
+            size = self.length
+        data = self.rfile.read(size) if size else b""
+        self.length -= len(data)
+        return data
+
+
+class _BuildRequestHandler(BaseHTTPRequestHandler):
+    server_app: BuildServer
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format, *args):
+        ZipApp._log(f"[INFO]: {self.address_string()} {format % args}")
+
+    def send_json(self, code, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_file(self, path, headers=None):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Length", str(size))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile, self.server_app.CHUNK_SIZE)
+
+    def get_artifact_path(self):
+        name = self.path[len(self.server_app.ARTIFACTS_PATH) :]
+        store = self.server_app.artifacts
+        if not name.endswith(store.SUFFIX):
+            raise ValueError(f"invalid artifact name: {name!r}")
+        return store.get_path(name[: -len(store.SUFFIX)])
+
+    def do_GET(self):
+        if self.path == self.server_app.STATUS_PATH:
+            return self.send_json(200, self.server_app.status())
+        if self.path.startswith(self.server_app.ARTIFACTS_PATH):
+            try:
+                path = self.get_artifact_path()
+                return self.send_file(path)
+            except ValueError as error:
+                return self.send_json(400, {"error": str(error)})
+            except FileNotFoundError:
+                pass
+        return self.send_json(404, {"error": "not found"})
+
+    def do_PUT(self):
+        if not self.path.startswith(self.server_app.ARTIFACTS_PATH):
+            return self.send_json(404, {"error": "not found"})
+        try:
+            path = self.get_artifact_path()
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError as error:
+            return self.send_json(400, {"error": str(error)})
+        body = _BodyReader(self.rfile, length)
+        self.server_app.artifacts._replace_from(body, path)
+        return self.send_json(201, {"path": path.name})
+
+    def do_POST(self):
+        if self.path != self.server_app.BUILD_PATH:
+            return self.send_json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            kwargs = json.loads(self.rfile.read(length) or b"{}")
+            future = self.server_app.submit(kwargs)
+        except ValueError as error:
+            return self.send_json(400, {"error": str(error)})
+        try:
+            result = future.result()
+        except Exception as error:
+            return self.send_json(500, {"error": repr(error)})
+        # the later builds will replace but not truncate the opened file
+        headers = {
+            "Content-Disposition": f'attachment; filename="{Path(result["path"]).name}"',
+            "X-Zipapps-Cached": str(int(result["cached"])),
+        }
+        return self.send_file(result["path"], headers)
+
+
+def serve(
+    address: str,
+    work_dir: typing.Optional[str] = None,
+    max_workers=None,
+    max_age="7d",
+    allow_remote=False,
+):
+    server = BuildServer(
+        address=address,
+        work_dir=work_dir,
+        max_workers=max_workers,
+        max_age=max_age,
+        allow_remote=allow_remote,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("", file=sys.stderr)